@@ -0,0 +1,172 @@
+"""
+Benchmarks of building populations, of one simulated day under each society, and of whole runs, at a range of
+sizes. Run as
+
+    python -m codit.benchmark --sizes 10000 100000 1000000 --out results.json
+
+and compare the results of two versions with codit.benchmark.compare(old.json, new.json)
+"""
+import argparse
+import functools
+import json
+import logging
+import platform
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from codit.disease import Covid
+from codit.outbreak import Outbreak
+from codit.rng import RandomStream
+from codit.society import Society, UKSociety, ContactTestingSociety
+from codit.society.lateral import LateralFlowUK
+from codit.society.alternatives import StrategicTester
+from codit.society.strategic import TwoTrackSystem
+from codit.population.networks.city import CityPopulation
+from codit.population.networks.household_workplace import HouseholdWorkplacePopulation
+from codit.population.networks.radial_age import RadialAgePopulation
+from codit.population.transmission import VECTORIZED
+
+SIZES = (10_000, 100_000, 1_000_000)
+POPULATIONS = (CityPopulation, HouseholdWorkplacePopulation, RadialAgePopulation)
+SOCIETIES = (UKSociety, ContactTestingSociety, TwoTrackSystem, LateralFlowUK, StrategicTester)
+BENCHMARKS = ('build', 'day', 'simulate')
+
+
+def measure(make, run, memory=True):
+    """
+    Time run(make()), and then, if memory, run it again on another make() to find the peak memory it allocates.
+    Only run is timed, or traced
+    :return: a dictionary of the seconds and peak bytes
+    """
+    subject = make()
+    start = time.perf_counter()
+    run(subject)
+    result = dict(seconds=time.perf_counter() - start, peak_bytes=None)
+    if memory:
+        subject = make()
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        run(subject)
+        result['peak_bytes'] = tracemalloc.get_traced_memory()[1] - base
+        if not tracing:
+            tracemalloc.stop()
+    return result
+
+
+def bench_build(population_type, n, seed=0, memory=True):
+    """
+    :return: the time to build a population of n people, and the people it builds a second
+    """
+    result = measure(lambda: None, lambda _: population_type(n, Society(), rng=RandomStream(seed)), memory)
+    return dict(benchmark='build', name=population_type.__name__, n_people=n,
+                people_per_second=n / result['seconds'], **result)
+
+
+def bench_day(society_type, n, population_type, seed=0, warm_up_days=5, memory=True):
+    """
+    :return: the time to simulate one day under society_type, after warm_up_days of the outbreak, and the
+    person-steps simulated a second. Each measurement runs a fork of the same warmed-up outbreak
+    """
+    o = Outbreak(society_type(), Covid(), pop_size=n, seed_size=max(n // 100, 1), n_days=warm_up_days + 1,
+                 population_type=population_type, seed=seed)
+    o.simulate(n_days=warm_up_days)
+    result = measure(o.fork, lambda branch: branch.simulate(n_days=warm_up_days + 1), memory)
+    periods = o.society.episodes_per_day
+    return dict(benchmark='day', name=society_type.__name__, n_people=n, periods=periods,
+                person_steps_per_second=n * periods / result['seconds'], **result)
+
+
+def bench_simulate(society_type, n, population_type, n_days, seed=0, memory=True):
+    """
+    :return: the time to simulate a whole outbreak of n_days under society_type, once its population is built,
+    and the person-steps simulated a second
+    """
+    def make():
+        return Outbreak(society_type(), Covid(), pop_size=n, seed_size=max(n // 100, 1), n_days=n_days,
+                        population_type=population_type, seed=seed)
+    result = measure(make, lambda o: o.simulate(), memory)
+    periods = n_days * society_type().episodes_per_day
+    return dict(benchmark='simulate', name=society_type.__name__, n_people=n, periods=periods,
+                person_steps_per_second=n * periods / result['seconds'], **result)
+
+
+def run_benchmarks(sizes=SIZES, benchmarks=BENCHMARKS, n_days=20, memory=True, seed=0):
+    """
+    :return: a list of the results of each benchmark at each size, as dictionaries. The days and whole runs are
+    simulated on CityPopulation networks, built once for each size and then loaded from a cache
+    """
+    results = []
+    for n in sizes:
+        cache = tempfile.mkdtemp(prefix='codit-benchmark-')
+        population_type = functools.partial(CityPopulation, transmission=VECTORIZED, network_cache=cache)
+        try:
+            if 'build' in benchmarks:
+                for pt in POPULATIONS:
+                    results.append(bench_build(pt, n, seed=seed, memory=memory))
+                    logging.info(f"benchmark {results[-1]}")
+            if 'day' in benchmarks:
+                for st in SOCIETIES:
+                    results.append(bench_day(st, n, population_type, seed=seed, memory=memory))
+                    logging.info(f"benchmark {results[-1]}")
+            if 'simulate' in benchmarks:
+                results.append(bench_simulate(LateralFlowUK, n, population_type, n_days, seed=seed, memory=memory))
+                logging.info(f"benchmark {results[-1]}")
+        finally:
+            shutil.rmtree(cache, ignore_errors=True)
+    return results
+
+
+def save_results(results, path):
+    report = dict(created=time.strftime('%Y-%m-%dT%H:%M:%S'), python=platform.python_version(),
+                  numpy=np.__version__, machine=platform.machine(), processor=platform.processor(),
+                  results=results)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def load_results(path):
+    """
+    :return: a dataframe of the results saved in path, indexed by benchmark, name and n_people
+    """
+    with open(path) as f:
+        report = json.load(f)
+    return pd.DataFrame(report['results']).set_index(['benchmark', 'name', 'n_people'])
+
+
+def compare(old_path, new_path):
+    """
+    :return: a dataframe of the seconds and peak bytes of each benchmark run in both, and the ratio of new to old
+    """
+    old, new = load_results(old_path), load_results(new_path)
+    df = old[['seconds', 'peak_bytes']].join(new[['seconds', 'peak_bytes']], how='inner', lsuffix=' old',
+                                             rsuffix=' new')
+    df['seconds ratio'] = df['seconds new'] / df['seconds old']
+    df['peak bytes ratio'] = df['peak_bytes new'] / df['peak_bytes old']
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--benchmarks', nargs='+', choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument('--days', type=int, default=20, help="the days of each whole run")
+    parser.add_argument('--no-memory', action='store_true', help="skip the second, traced, run of each benchmark")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='benchmarks.json')
+    args = parser.parse_args(argv)
+    logging.basicConfig(format='%(asctime)s %(levelname)s:%(message)s', level=logging.INFO)
+    results = run_benchmarks(args.sizes, args.benchmarks, n_days=args.days, memory=not args.no_memory,
+                             seed=args.seed)
+    save_results(results, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+import io
+import os
+import pickle
+
+import numpy as np
+
+from codit.config import shared_config
+from codit.population.person import Person, Isolation
+
+# attributes of a person that are restored from their population, or from other attributes, rather than stored
+DERIVED = ('cfg', 'society', 'population', 'network', 'arrays', 'victims')
+SCALARS = (bool, int, float, str, np.bool_, np.number)
+
+
+class CheckpointPickler(pickle.Pickler):
+    """
+    Pickles everything but people, who are pickled only as their idx, since their state is stored as columns, and
+    the shared objects, which are pickled only as their id, to be given back as they are
+    """
+    def __init__(self, file, shared=None):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.shared = shared or {}
+
+    def persistent_id(self, obj):
+        if isinstance(obj, Person):
+            return obj.idx
+        if id(obj) in self.shared:
+            return 'shared', id(obj)
+        return None
+
+
+class CheckpointUnpickler(pickle.Unpickler):
+    def __init__(self, file, people, shared=None):
+        super().__init__(file)
+        self.people = people
+        self.shared = shared or {}
+
+    def persistent_load(self, pid):
+        if isinstance(pid, tuple):
+            return self.shared[pid[1]]
+        return self.people[pid]
+
+
+def save_checkpoint(outbreak, path):
+    """
+    Write the state of outbreak to path, as flat arrays of the state of its people, and a pickle of everything
+    else (society, queues, timers, recorder, random numbers and the network), in which each person is only an idx.
+    The file is written alongside path, then moved into place, so that a crash never leaves half a checkpoint
+    """
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        np.savez(f, **outbreak_state(outbreak))
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path):
+    """
+    :return: the Outbreak saved in path by save_checkpoint, ready to carry on simulating
+    """
+    with np.load(path) as data:
+        return restore_outbreak({name: data[name] for name in data.files})
+
+
+def outbreak_state(outbreak, shared=None):
+    """
+    :param shared: a dictionary from id to the objects, like the network, which are not to be pickled, but referred
+    to, so that restore_outbreak, given the same dictionary, puts the objects themselves back
+    :return: a dictionary of arrays of the state of outbreak, as save_checkpoint writes them
+    """
+    people = outbreak.pop.people
+    person_type = type(people[0])
+    assert all(type(p) is person_type for p in people), "people of mixed types cannot be checkpointed"
+
+    diseases = []
+    columns, objects = {}, {}
+    names = attribute_names(people[0])
+    for name in names:
+        if name in DERIVED:
+            continue
+        values = [getattr(p, name) for p in people]
+        if name == 'infector':
+            values = [None if v is None else v.idx for v in values]
+        elif name == 'isolation':
+            values = [None if v is None else v.days_elapsed for v in values]
+        elif name == 'disease':
+            for v in values:
+                if v is not None and not any(v is d for d in diseases):
+                    diseases.append(v)
+            values = [None if v is None else next(i for i, d in enumerate(diseases) if v is d) for v in values]
+        column = to_column(values)
+        if column is None:
+            objects[name] = values
+        else:
+            columns.update({f"{name}{suffix}": a for suffix, a in column.items()})
+
+    head = dict(person_type=person_type, n_people=len(people), has_victims='victims' in names)
+    rest = io.BytesIO()
+    CheckpointPickler(rest, shared).dump(
+        dict(diseases=diseases, objects=objects, arrays=outbreak.pop.arrays, outbreak=outbreak))
+    return dict(head=as_bytes(pickle.dumps(head)), rest=as_bytes(rest.getbuffer()), **columns)
+
+
+def restore_outbreak(columns, shared=None):
+    """
+    :param columns: the dictionary of arrays made by outbreak_state
+    :param shared: the dictionary of shared objects given to outbreak_state
+    :return: the Outbreak whose state they are, ready to carry on simulating
+    """
+    columns = dict(columns)
+    head = pickle.loads(columns.pop('head').tobytes())
+
+    # people are made as empty shells, so that the pickle can refer to them, and filled in afterwards
+    person_type = head['person_type']
+    people = [person_type.__new__(person_type) for _ in range(head['n_people'])]
+    state = CheckpointUnpickler(io.BytesIO(columns.pop('rest').tobytes()), people, shared).load()
+    outbreak = state['outbreak']
+    pop = outbreak.pop
+
+    values = {name: from_column(columns, name) for name in {c.rsplit('.', 1)[0] for c in columns}}
+    values.update(state['objects'])
+    if 'infector' in values:
+        values['infector'] = [None if i is None else people[i] for i in values['infector']]
+    if 'isolation' in values:
+        values['isolation'] = [None if d is None else restore_isolation(d) for d in values['isolation']]
+    if 'disease' in values:
+        values['disease'] = [None if i is None else state['diseases'][i] for i in values['disease']]
+
+    # everyone shares their society's config
+    derived = {'cfg': shared_config(pop.society.cfg.__dict__), 'society': pop.society, 'population': pop}
+    if getattr(pop, 'contacts', None) is not None:
+        derived['network'] = pop.contacts
+    if state['arrays'] is not None:
+        derived['arrays'] = state['arrays']
+    derived.setdefault('network', None)
+    for i, person in enumerate(people):
+        for name, value in derived.items():
+            setattr(person, name, value)
+        for name, column in values.items():
+            setattr(person, name, column[i])
+        if head['has_victims']:
+            person.victims = set()
+    if head['has_victims']:
+        for person in people:
+            if person.infector is not None:
+                person.infector.victims.add(person)
+    return outbreak
+
+
+def attribute_names(person):
+    """
+    :return: the names of the attributes that person holds themselves, in slots or in their __dict__
+    """
+    slots = [name for cls in type(person).__mro__ for name in cls.__dict__.get('__slots__', ())
+             if name != '__dict__' and hasattr(person, name)]
+    return slots + [name for name in vars(person) if name not in slots]
+
+
+def as_bytes(buffer):
+    return np.frombuffer(buffer, dtype=np.uint8)
+
+
+def restore_isolation(days_elapsed):
+    isolation = Isolation()
+    isolation.days_elapsed = days_elapsed
+    return isolation
+
+
+def to_column(values):
+    """
+    :return: a dictionary of arrays holding values, which must be None or scalars of one type, as
+    {'.values': array} and, if any are None, {'.none': mask} as well. Or None if the values are not like that
+    """
+    types = {type(v) for v in values} - {type(None)}
+    if types == {int, float}:
+        types = {float}
+    if len(types) > 1 or not all(issubclass(t, SCALARS) for t in types):
+        return None
+    none = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+    fill = types.pop()() if types else False
+    column = {'.values': np.array([fill if v is None else v for v in values])}
+    if none.any():
+        column['.none'] = none
+    return column
+
+
+def from_column(columns, name):
+    values = columns[f"{name}.values"].tolist()
+    if f"{name}.none" in columns:
+        for i in np.flatnonzero(columns[f"{name}.none"]).tolist():
+            values[i] = None
+    return values
@@ -1,5 +1,14 @@
+import types
+
 
 class CFG:
+    """
+    The parameters of the simulation. A CFG is shared by everything configured alike, so it holds no state of its
+    own: those overridden are class attributes of a subclass made for each set of overrides, and __dict__ is a
+    read-only view of them
+    """
+    __slots__ = ()
+    _OVERRIDES = types.MappingProxyType({})
 
     # Disease:
     _TARGET_R0 = 1.4  # before Test and Trace and Isolation
@@ -36,13 +45,47 @@ class CFG:
                                              PROB_APPLY_FOR_TEST_IF_SYMPTOMS * \
                                              PROB_TEST_IF_REQUESTED   # should be 0.205
 
+    def __setattr__(self, name, value):
+        raise AttributeError("a CFG is shared by everyone configured alike, so cannot be changed: "
+                             "pass overrides to set_config instead")
+
+    @property
+    def __dict__(self):
+        return self._OVERRIDES
+
+    def __reduce__(self):
+        # its class is made on the fly, so a pickle or copy of a CFG is the shared one with the same overrides
+        return shared_config, (dict(self._OVERRIDES),)
+
+
+_SHARED = {}    # from the sorted items of each set of overrides, to the one CFG configured by them
+
+
+def shared_config(conf):
+    """
+    :return: the CFG with the overrides in conf, which is shared by everything configured with the same overrides
+    """
+    key = tuple(sorted((conf or {}).items()))
+    try:
+        return _SHARED[key]
+    except TypeError:   # an override which cannot be hashed
+        return new_config(conf)
+    except KeyError:
+        return _SHARED.setdefault(key, new_config(conf))
+
+
+def new_config(conf):
+    conf = dict(conf or {})
+    extra_params = (conf.keys() - {name for name in dir(CFG) if not name.startswith('__')})
+    if len(extra_params) > 0:
+        raise AttributeError(f"unrecognised parameter overrides: {extra_params}")
+    if not conf:
+        return CFG()
+    return type(CFG.__name__, (CFG,), dict(conf, __slots__=(), _OVERRIDES=types.MappingProxyType(conf)))()
+
+
 def set_config(obj, conf):
-    obj.cfg = CFG()
-    if conf is not None:
-        extra_params = (conf.keys() - set(dir(obj.cfg)))
-        if len(extra_params) > 0:
-            raise AttributeError(f"unrecognised parameter overrides: {extra_params}")
-    obj.cfg.__dict__.update(conf or {})
+    obj.cfg = shared_config(conf)
 
 
 def print_baseline_config():
@@ -0,0 +1,120 @@
+import functools
+import logging
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from codit.outbreak import Outbreak
+from codit.population.population import FixedNetworkPopulation
+from codit.rng import seed_sequence
+
+
+class Looper:
+    """
+    Runs many replicas of an outbreak under each of several policies, to measure the stochasticity of the results.
+    Replicas run over a pool of processes, each with its own stream of random numbers spawned from one seed.
+    Replica i of every policy gets the same stream, so that policies are compared on common random numbers.
+    """
+
+    SHARE_NETWORK = False
+
+    def __init__(self, policies, disease, n_replicas, seed=None, n_workers=None, share_network=None,
+                 network_cache=None, **outbreak_kwargs):
+        """
+        :param policies: a dictionary from the name of each policy to a function (eg. a Society subclass)
+        returning a new society, which must be picklable, so not a lambda
+        :param disease: the disease, passed to each Outbreak
+        :param n_replicas: how many times to run each policy
+        :param seed: the entropy from which the replicas' streams are spawned. If None, fresh entropy is drawn,
+        and may be found in self.seed_sequence.entropy
+        :param n_workers: the number of processes, or if None the number of processors. If 1, replicas are
+        run in this process
+        :param share_network: if True, every replica of a policy runs on one network, built once before the
+        replicas start and then memory-mapped read-only by each of them, so that the workers share its pages
+        rather than each holding a copy. This needs a FixedNetworkPopulation. If None, this is given by the
+        class attribute SHARE_NETWORK
+        :param network_cache: the directory in which to keep the shared networks. If None, a temporary directory
+        is used, and removed when the replicas are done
+        :param outbreak_kwargs: passed to each Outbreak, eg. pop_size, seed_size, n_days, population_type
+        """
+        self.policies = policies
+        self.disease = disease
+        self.n_replicas = n_replicas
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.n_workers = n_workers
+        self.share_network = self.SHARE_NETWORK if share_network is None else share_network
+        self.network_cache = network_cache
+        self.outbreak_kwargs = outbreak_kwargs
+
+    def tasks(self):
+        streams = seed_sequence(self.seed_sequence).spawn(self.n_replicas)
+        for replica, stream in enumerate(streams):
+            for name, society_type in self.policies.items():
+                yield name, replica, stream, society_type
+
+    def network_seed(self):
+        """
+        :return: the seed of the networks shared by the replicas, spawned after the replicas' own streams
+        """
+        return seed_sequence(self.seed_sequence).spawn(self.n_replicas + 1)[-1]
+
+    def stream(self):
+        """
+        :return: a generator of the dataframe of each replica, in the order they finish, with columns
+        'policy' and 'replica' as well as those of OutbreakRecorder.get_dataframe
+        """
+        if not self.share_network:
+            yield from self._stream(self.outbreak_kwargs)
+            return
+
+        cache = self.network_cache or tempfile.mkdtemp(prefix='codit-networks-')
+        population_type = self.outbreak_kwargs.get('population_type') or FixedNetworkPopulation
+        outbreak_kwargs = dict(self.outbreak_kwargs, network_seed=self.network_seed(),
+                               population_type=functools.partial(population_type, network_cache=cache))
+        try:
+            for society_type in self.policies.values():
+                # build each network here, rather than have the first replicas race to build it
+                Outbreak(society_type(), self.disease, **dict(outbreak_kwargs, seed_size=0, n_days=0))
+            yield from self._stream(outbreak_kwargs)
+        finally:
+            if self.network_cache is None:
+                shutil.rmtree(cache, ignore_errors=True)
+
+    def _stream(self, outbreak_kwargs):
+        if self.n_workers == 1:
+            for task in self.tasks():
+                yield run_replica(task, self.disease, outbreak_kwargs)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.n_workers) as pool:
+            futures = [pool.submit(run_replica, task, self.disease, outbreak_kwargs) for task in self.tasks()]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def run(self):
+        """
+        :return: one long dataframe of every replica, sorted by policy, replica and day
+        """
+        results = []
+        for df in self.stream():
+            results.append(df)
+            logging.info(f"{len(results)} of {self.n_replicas * len(self.policies)} replicas finished")
+        df = pd.concat(results, ignore_index=True)
+        return df.sort_values(['policy', 'replica', 'days of epidemic'], ignore_index=True)
+
+
+def run_replica(task, disease, outbreak_kwargs):
+    """
+    :param task: (policy name, replica number, SeedSequence, society type)
+    :return: the recorder's dataframe, with the policy and replica as columns
+    """
+    name, replica, stream, society_type = task
+    o = Outbreak(society_type(), disease, seed=stream, **outbreak_kwargs)
+    o.simulate()
+    df = o.recorder.get_dataframe().reset_index()
+    df.insert(0, 'replica', replica)
+    df.insert(0, 'policy', name)
+    return df
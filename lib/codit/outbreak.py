@@ -1,19 +1,51 @@
+import os
+
+import numpy as np
 import pandas as pd
 import logging
 
+from codit.checkpoint import outbreak_state, restore_outbreak, save_checkpoint
+from codit.config import set_config
+
 from codit.population.covid import PersonCovid
 from codit.population.population import FixedNetworkPopulation
+from codit.rng import RandomStream, seed_sequence
+from codit.timing import NO_TIMER, Profile, Timer
 
-from codit.disease import covid_hazard
 
 
 class Outbreak:
+
+    TIMING = False   # whether to time each phase of simulate, and count the tests, infections and tracing in them
+
     def __init__(self, society, disease, pop_size=0, seed_size=0, n_days=0,
                  population=None,
                  population_type=None,
-                 person_type=None):
-
-        self.pop = self.prepare_population(pop_size, population, population_type, society, person_type)
+                 person_type=None,
+                 seed=None,
+                 network_seed=None,
+                 timing=None,
+                 profile_steps=None):
+        """
+        :param seed: an int or SeedSequence, from which we spawn one stream of random numbers to build the
+        population and another for everything random in the simulation. If None, fresh entropy is used.
+        :param network_seed: if given, the population is built from this seed instead, so that outbreaks with
+        different seeds can share one network
+        :param timing: if given, overrides the class's TIMING. The timings are left on the recorder as a table
+        :param profile_steps: if given, a (start, stop) range of step numbers to run under cProfile and tracemalloc,
+        whose pstats.Stats and Snapshot are left on the recorder as profile and memory
+        """
+        build_seed, run_seed = seed_sequence(seed).spawn(2)
+        if network_seed is not None:
+            build_seed = network_seed
+        self.rng = RandomStream(run_seed)
+        self.timer = Timer() if (self.TIMING if timing is None else timing) else NO_TIMER
+        self.profile_steps = profile_steps
+        self.pop = self.prepare_population(pop_size, population, population_type, society, person_type,
+                                           RandomStream(build_seed))
+        self.pop.rng = self.rng
+        society.rng = self.rng
+        society.timer = self.timer
         society.clear_queues()
         self.pop.seed_infections(seed_size, disease)
 
@@ -25,7 +57,7 @@ class Outbreak:
 
         self.set_recorder()
 
-    def prepare_population(self, pop_size, population, population_type, society, person_type):
+    def prepare_population(self, pop_size, population, population_type, society, person_type, rng):
         if population:
             assert pop_size in (0, len(population.people)), "provide a population of the correct size"
             logging.warning("Using a pre-existing population - does it have the right network structure?")
@@ -38,7 +70,7 @@ class Outbreak:
 
         population_type = population_type or FixedNetworkPopulation
         person_type = person_type or PersonCovid
-        return population_type(pop_size, society, person_type=person_type)
+        return population_type(pop_size, society, person_type=person_type, rng=rng)
 
     def set_recorder(self, recorder=None):
         self.recorder = recorder or OutbreakRecorder()
@@ -51,12 +83,40 @@ class Outbreak:
         self.time = 0
         self.step_num = 0
 
-    def simulate(self):
-        for t in range(self.n_periods):
-            self.update_time()
-            self.society.manage_outbreak(self.pop)
-            self.pop.attack_in_groupings(self.group_size)
-            self.record_state()
+    def simulate(self, n_days=None, checkpoint=None, checkpoint_days=10):
+        """
+        :param n_days: the day of the epidemic up to which to run, from wherever it has got to. If None, run to the
+        end, self.n_days
+        :param checkpoint: if given, a path to which to save the outbreak every checkpoint_days, so that a run
+        which is stopped can be resumed by codit.checkpoint.load_checkpoint(checkpoint).simulate()
+        """
+        n_periods = self.n_periods if n_days is None else n_days * self.society.episodes_per_day
+        timer, profile = self.timer, None
+        while self.step_num < n_periods:
+            if self.profile_steps and self.step_num == self.profile_steps[0]:
+                profile = Profile()
+            with timer.phase('update time'):
+                self.update_time()
+            with timer.phase('manage outbreak'):
+                self.society.manage_outbreak(self.pop)
+            with timer.phase('attack'):
+                if timer.on:
+                    n_infected = self.pop.count_infected()
+                self.pop.attack_in_groupings(self.group_size)
+                if timer.on:
+                    timer.count('infections', self.pop.count_infected() - n_infected)
+            with timer.phase('record'):
+                self.record_state()
+            if checkpoint and self.step_num % (checkpoint_days * self.society.episodes_per_day) == 0:
+                with timer.phase('checkpoint'):
+                    save_checkpoint(self, checkpoint)
+            if profile is not None and self.step_num == self.profile_steps[1]:
+                self.recorder.profile, self.recorder.memory = profile.stop()
+                profile = None
+        if profile is not None:
+            self.recorder.profile, self.recorder.memory = profile.stop()
+        if timer.on:
+            self.recorder.timings = timer.table()
         self.recorder.realized_r0 = self.pop.realized_r0()
         self.recorder.society_config = self.society.cfg
         self.recorder.disease_config = self.disease.cfg
@@ -70,33 +130,102 @@ class Outbreak:
     def record_state(self):
         self.recorder.record_step(self)
 
+    def snapshot(self):
+        """
+        :return: a copy of this outbreak as it stands, with its people, queues, timers, recorder and the state of
+        its stream of random numbers, but sharing the network, which never changes. The copy can be run on,
+        independently of this one, or kept to fork several branches from
+        """
+        # made as a checkpoint is, in memory, so that people, and the chains of infection between them, are
+        # copied as columns rather than by recursing through them
+        shared = self.pop.shared_with_copies()
+        snapshot = restore_outbreak(outbreak_state(self, shared), shared)
+        snapshot.society.test_recorder.branch()
+        return snapshot
+
+    def fork(self, society=None, seed=None):
+        """
+        :param society: if given, the branch carries on under this society instead, starting with empty queues
+        :param seed: if given, the branch carries on with a new stream of random numbers from this seed.
+        Otherwise it draws the same numbers as this outbreak would, so that branches are compared on common
+        random numbers
+        :return: a snapshot of this outbreak, to be run on as a branch of it
+        """
+        branch = self.snapshot()
+        if seed is not None:
+            branch.set_rng(RandomStream(seed))
+        if society is not None:
+            branch.set_society(society)
+        return branch
+
+    def set_rng(self, rng):
+        self.rng = rng
+        self.pop.rng = rng
+        self.society.rng = rng
+
+    def set_society(self, society):
+        """
+        Carry on the outbreak under society, which everyone now follows
+        """
+        assert society.episodes_per_day == self.society.episodes_per_day, "a society must keep to the same timestep"
+        society.rng = self.rng
+        society.timer = self.timer
+        society.clear_queues()
+        self.pop.society = society
+        for person in self.pop.people:
+            person.society = society
+            set_config(person, society.cfg.__dict__)
+        self.society = society
+        self.group_size = society.encounter_size
+
     def plot(self, **kwargs):
         self.recorder.plot(**kwargs)
 
 
 class OutbreakRecorder:
-    def __init__(self):
+    COLUMNS = ['days of epidemic', 'ever infected', 'infectious',
+               'tested daily', 'waiting for test results', 'isolating']  # , 'daily_detected_']
+    EVERY = 1   # the periods between the steps recorded, or 'day' for the last period of each day
+
+    def __init__(self, every=None):
+        """
+        :param every: if given, overrides the class's EVERY
+        """
         self.story = []
+        self.hazard = []
         self.realized_r0 = None
+        self.every = self.EVERY if every is None else every
+        self.timings = self.profile = self.memory = None    # set by Outbreak.simulate if it is timed or profiled
+
+    def samples(self, o):
+        """
+        :return: whether to record the step the outbreak o has just taken. The last step is always recorded
+        """
+        every = o.society.episodes_per_day if self.every == 'day' else self.every
+        return o.step_num % every == 0 or o.step_num == o.n_periods
 
     def record_step(self, o):
+        logs = o.step_num % (50 * o.society.episodes_per_day) == 1 or (o.step_num == o.n_periods)
+        if not (logs or self.samples(o)):
+            return
         N = len(o.pop.people)
-        # pot_haz = sum([covid_hazard(person.age) for person in o.pop.people])
-        # tot_haz = sum([covid_hazard(person.age) for person in o.pop.infected()])
-        all_completed_tests = [t for q in o.society.queues for t in q.completed_tests]
         step = [o.time,
                 o.pop.count_infected() / N,
                 o.pop.count_infectious() / N,
-                len(all_completed_tests) / N / o.time_increment,
-                sum(len([t for t in q.tests if t.swab_taken]) for q in o.society.queues) / N,
-                sum(p.isolating for p in o.pop.people) / N,
+                sum(len(q.completed_tests) for q in o.society.queues) / N / o.time_increment,
+                sum(q.n_swabbed for q in o.society.queues) / N,
+                o.pop.count_isolating() / N,
                 # len([t for t in all_completed_tests if t.positive]) / N / o.time_increment,
-                # tot_haz/pot_haz,
                 ]
-        if o.step_num % (50 * o.society.episodes_per_day) == 1 or (o.step_num == o.n_periods):
+        if logs:
             logging.info(f"Day {int(step[0])}, prop infected is {step[1]:2.2f}, "
                          f"prop infectious is {step[2]:2.4f}")
+        if self.samples(o):
+            self.write(step, o.pop.hazard_infected())
+
+    def write(self, step, hazard):
         self.story.append(step)
+        self.hazard.append(hazard)
 
     def plot(self, **kwargs):
         df = self.get_dataframe()
@@ -105,9 +234,105 @@ class OutbreakRecorder:
         logging.info(f" Realized R0 of early infections is {self.realized_r0:2.2f}")
         logging.info(f" {self.story[-1][1] * 100:2.1f} percent of the proportion was infected during the epidemic")
 
-    def get_dataframe(self):
-        df = pd.DataFrame(self.story)
-        df.columns = ['days of epidemic', 'ever infected', 'infectious',
-                      'tested daily', 'waiting for test results', 'isolating']  # , 'daily_detected_']
+    def get_dataframe(self, hazard=False):
+        """
+        :param hazard: if True, with an 'infected hazard' column as well, of the covid_hazard of everyone infected
+        so far, as a fraction of the hazard of everyone, which is nan if the people do not have ages
+        """
+        df = pd.DataFrame(self.story, columns=self.COLUMNS)
+        if hazard:
+            df['infected hazard'] = self.hazard
         df = df.set_index('days of epidemic')
         return df
+
+
+class StreamingRecorder(OutbreakRecorder):
+    """
+    Writes each step recorded straight to path, as a row of float64s of the COLUMNS and the infected hazard,
+    rather than keeping the story in memory. Rows are only ever appended, so that another process can follow a
+    long run with read_recording(path) while it goes
+    """
+    def __init__(self, path, every=None):
+        """
+        :param every: if given, overrides the class's EVERY
+        """
+        self.path = path
+        self.file = None
+        super().__init__(every)
+
+    def __getstate__(self):
+        # the file is not pickled with a checkpoint, but opened again by the first write after it is loaded
+        state = self.__dict__.copy()
+        state['file'] = None
+        return state
+
+    def start(self):
+        """
+        Start an empty recording at path, keeping the file open for the rows to come
+        """
+        if self.file is not None:
+            self.file.close()
+        self.file = open(self.path, 'wb', buffering=0)
+        self.n_rows = 0
+
+    def write(self, step, hazard):
+        row = np.array(step + [hazard], dtype=np.float64)
+        if self.file is None:
+            # carrying on from a checkpoint: write from our own row on, dropping any written after it was saved
+            self.file = open(self.path, 'r+b', buffering=0)
+            self.file.seek(self.n_rows * row.nbytes)
+            self.file.truncate()
+        self.file.write(row.tobytes())
+        self.n_rows += 1
+
+    def rows(self):
+        return recorded_rows(self.path)[:self.n_rows]
+
+    @property
+    def story(self):
+        return self.rows()[:, :-1].tolist()
+
+    @story.setter
+    def story(self, story):
+        # an empty story, as OutbreakRecorder.__init__ sets, starts the recording afresh
+        assert not story, "a StreamingRecorder's story is only what it writes"
+        self.start()
+
+    @property
+    def hazard(self):
+        return self.rows()[:, -1].tolist()
+
+    @hazard.setter
+    def hazard(self, hazard):
+        assert not hazard, "a StreamingRecorder's hazard is only what it writes"
+        if self.n_rows:
+            self.start()
+
+    def get_dataframe(self, hazard=False):
+        return recording_frame(self.rows(), hazard)
+
+
+def recorded_rows(path):
+    """
+    :return: a memory-mapped array of the rows written so far to path by a StreamingRecorder, leaving out any
+    row still being written
+    """
+    n_columns = len(OutbreakRecorder.COLUMNS) + 1
+    n_rows = os.path.getsize(path) // (8 * n_columns)
+    if n_rows == 0:
+        return np.zeros((0, n_columns))
+    return np.memmap(path, dtype=np.float64, mode='r', shape=(n_rows, n_columns))
+
+
+def read_recording(path, hazard=False):
+    """
+    :return: the dataframe of what a StreamingRecorder has written to path so far, as OutbreakRecorder.get_dataframe
+    """
+    return recording_frame(recorded_rows(path), hazard)
+
+
+def recording_frame(rows, hazard=False):
+    df = pd.DataFrame(np.array(rows), columns=OutbreakRecorder.COLUMNS + ['infected hazard'])
+    if not hazard:
+        df = df.drop(columns=['infected hazard'])
+    return df.set_index('days of epidemic')
@@ -0,0 +1,155 @@
+import numpy as np
+
+from codit.population.network import CSR
+from codit.population.person import Person, Isolation
+from codit.population.covid import PersonCovid
+
+
+class PeopleArrays:
+    """
+    The state of a whole population, held as one numpy array per attribute and indexed by person.idx
+    (a 'struct of arrays'), rather than as attributes spread over a list of Person objects.
+    """
+    def __init__(self, n_people):
+        self.infected = np.zeros(n_people, dtype=bool)
+        self.infectious = np.zeros(n_people, dtype=bool)
+        self.immune = np.zeros(n_people, dtype=bool)
+        self.symptomatic = np.zeros(n_people, dtype=bool)
+        self.has_tested_positive = np.zeros(n_people, dtype=bool)
+        self.time_since_infection = np.zeros(n_people, dtype=np.int32)
+        self.isolation_days = np.full(n_people, np.nan)   # nan when not isolating
+        self.age = np.full(n_people, np.nan)
+        self.infector = np.full(n_people, -1, dtype=np.int64)   # -1 when there is no infector
+        self.n_victims = np.zeros(n_people, dtype=np.int32)
+        self.victims_by_infector = None   # a CSR made by victims(), until the next infection
+        self.people = []
+
+    def __len__(self):
+        return len(self.infected)
+
+    @property
+    def isolating(self):
+        return ~np.isnan(self.isolation_days)
+
+    def victims(self):
+        """
+        :return: a CSR over idx from each person to those they infected, made from the infector column in one sort,
+        and kept until someone is infected again
+        """
+        if self.victims_by_infector is None:
+            infected = np.flatnonzero(self.infector >= 0)
+            order = infected[np.argsort(self.infector[infected], kind='stable')]
+            self.victims_by_infector = CSR.from_pairs(self.infector[order], order, len(self))
+        return self.victims_by_infector
+
+    def chain_lengths(self, max_chain_len):
+        """
+        :return: for each person, the length of person.chain(), although lengths above max_chain_len are
+        reported as max_chain_len + 1
+        """
+        lengths = np.ones(len(self), dtype=np.int32)
+        ancestor = self.infector.copy()
+        for _ in range(max_chain_len):
+            has_ancestor = ancestor >= 0
+            if not has_ancestor.any():
+                break
+            lengths[has_ancestor] += 1
+            ancestor[has_ancestor] = self.infector[ancestor[has_ancestor]]
+        return lengths
+
+
+class ArrayIsolation(Isolation):
+    """
+    A view onto one person's entry in PeopleArrays.isolation_days
+    """
+    def __init__(self, arrays, idx):
+        self.arrays = arrays
+        self.idx = idx
+
+    @property
+    def days_elapsed(self):
+        return float(self.arrays.isolation_days[self.idx])
+
+    @days_elapsed.setter
+    def days_elapsed(self, days):
+        self.arrays.isolation_days[self.idx] = days
+
+
+def array_backed(name, to_python):
+    def get(self):
+        return to_python(getattr(self.arrays, name)[self.idx])
+
+    def put(self, value):
+        getattr(self.arrays, name)[self.idx] = value
+
+    return property(get, put)
+
+
+class ArrayPerson(Person):
+    """
+    A Person whose state lives in a PeopleArrays shared with the rest of the population.
+    The person object itself is only a handle (arrays, idx), so that the society code can carry on
+    treating people as objects, while the population reads and writes their state in bulk.
+    """
+    __slots__ = ('arrays',)
+    infected = array_backed('infected', bool)
+    infectious = array_backed('infectious', bool)
+    immune = array_backed('immune', bool)
+    time_since_infection = array_backed('time_since_infection', int)
+    age = array_backed('age', float)
+
+    def __init__(self, society, config=None, name=None, idx=None, arrays=None):
+        if arrays is not None:
+            self.arrays = arrays
+        assert getattr(self, 'arrays', None) is not None, \
+            "an ArrayPerson needs to be given the PeopleArrays holding its state"
+        super().__init__(society, config=config, name=name, idx=idx)
+
+    @classmethod
+    def create_people(cls, n_people, society):
+        arrays = PeopleArrays(n_people)
+        arrays.people = [cls(society, config=society.cfg.__dict__, name=f"person {i}", idx=i, arrays=arrays)
+                         for i in range(n_people)]
+        return arrays.people
+
+    @property
+    def isolation(self):
+        if np.isnan(self.arrays.isolation_days[self.idx]):
+            return None
+        return ArrayIsolation(self.arrays, self.idx)
+
+    @isolation.setter
+    def isolation(self, isolation):
+        self.arrays.isolation_days[self.idx] = np.nan if isolation is None else isolation.days_elapsed
+
+    @property
+    def isolating(self):
+        return not np.isnan(self.arrays.isolation_days[self.idx])
+
+    @property
+    def infector(self):
+        i = self.arrays.infector[self.idx]
+        return None if i < 0 else self.arrays.people[i]
+
+    @infector.setter
+    def infector(self, infector):
+        self.arrays.infector[self.idx] = -1 if infector is None else infector.idx
+        self.arrays.victims_by_infector = None
+
+    @property
+    def victims(self):
+        return set(map(self.arrays.people.__getitem__, self.arrays.victims().row(self.idx).tolist()))
+
+    @victims.setter
+    def victims(self, victims):
+        assert not victims, "victims are recorded through the infector of each victim"
+        self.arrays.n_victims[self.idx] = 0
+
+    def add_victim(self, other):
+        self.arrays.n_victims[self.idx] += 1
+
+
+class ArrayPersonCovid(ArrayPerson, PersonCovid):
+    __slots__ = ()
+    _symptomatic = array_backed('symptomatic', bool)
+    has_tested_positive = array_backed('has_tested_positive', bool)
@@ -0,0 +1,102 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from codit.population.network import CSR
+
+
+class NetworkCache:
+    """
+    Keeps each network that a FixedNetworkPopulation builds in a directory of .npy files under root, keyed by the
+    type and size of the population, the seed it was built from and a hash of its config, and of the versions of
+    its builder and of the files. Another population with the same key memory-maps those files instead of
+    building its network again, so many runs can share one build, and only the state of the people themselves is
+    new.
+    """
+    FORMAT = 1    # of the arrays saved for each network
+
+    def __init__(self, root):
+        self.root = str(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, population, society):
+        """
+        :return: the name under which the network of population is cached, or None if it was built with fresh
+        entropy rather than from a seed, so could not be built again
+        """
+        seed = population.rng.seed_sequence
+        if seed is None:
+            return None
+        cls = type(population)
+        builder = repr((f"{cls.__module__}.{cls.__qualname__}", getattr(cls, 'NETWORK_VERSION', None), self.FORMAT))
+        config = repr(sorted(society.cfg.__dict__.items())) + repr(society.encounter_size)
+        seed = repr((seed.entropy, seed.spawn_key, seed.pool_size))
+        digest = hashlib.sha1((builder + config + seed).encode()).hexdigest()[:16]
+        return f"{type(population).__name__}-{len(population.people)}-{digest}"
+
+    def path(self, key):
+        return os.path.join(self.root, key)
+
+    def load(self, key):
+        """
+        :return: a dictionary of the cached arrays, memory-mapped read-only, or None if key is not cached
+        """
+        path = self.path(key)
+        if not os.path.isdir(path):
+            return None
+        logging.info(f"Loading the network {key} from {self.root}")
+        return {name[:-len('.npy')]: np.load(os.path.join(path, name), mmap_mode='r')
+                for name in os.listdir(path) if name.endswith('.npy')}
+
+    def save(self, key, arrays):
+        """
+        Write the arrays to a new directory, then move it into place, so that no one ever loads half a network
+        """
+        tmp = tempfile.mkdtemp(dir=self.root, prefix=f".{key}-")
+        for name, array in arrays.items():
+            if array is not None:
+                np.save(os.path.join(tmp, f"{name}.npy"), array)
+        try:
+            os.rename(tmp, self.path(key))
+        except OSError:
+            # someone else cached the same network first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def as_cache(cache):
+    """
+    :return: cache if it is a NetworkCache or None, otherwise a NetworkCache at the directory it names
+    """
+    return cache if cache is None or isinstance(cache, NetworkCache) else NetworkCache(cache)
+
+
+def network_arrays(population):
+    """
+    :return: the arrays describing the network of population, and the ages its builder gave to its people
+    """
+    ages = [getattr(p, 'age', None) for p in population.people]
+    if any(a is None for a in ages):
+        ages = None
+    return {'cliques_indptr': population.cliques.indptr, 'cliques_indices': population.cliques.indices,
+            'memberships_indptr': population.memberships.indptr,
+            'memberships_indices': population.memberships.indices,
+            'contacts_indptr': population.contacts.csr.indptr, 'contacts_indices': population.contacts.csr.indices,
+            'ages': None if ages is None else np.array(ages), 'clique_kinds': population.clique_kinds}
+
+
+def restore_network(population, arrays):
+    """
+    Give population the network in arrays, as returned by network_arrays or NetworkCache.load
+    :return: the CSR from each person to their contacts
+    """
+    population.cliques = CSR(arrays['cliques_indptr'], arrays['cliques_indices'])
+    population.memberships = CSR(arrays['memberships_indptr'], arrays['memberships_indices'])
+    population.clique_kinds = arrays.get('clique_kinds')
+    if 'ages' in arrays:
+        for p, age in zip(population.people, arrays['ages'].tolist()):
+            p.age = age
+    return CSR(arrays['contacts_indptr'], arrays['contacts_indices'])
@@ -0,0 +1,50 @@
+from collections import defaultdict
+
+
+class DiseaseCalendar:
+    """
+    The periods at which each infected person's disease moves on, so that update_disease is called only on those
+    milestones, rather than polled every period for everyone infected.
+    Each bucket holds (person.idx, periods since infection, days since infection) for the milestones falling due.
+    """
+    def __init__(self):
+        self.now = 0
+        self.buckets = defaultdict(list)
+
+    def schedule(self, person):
+        """
+        Put the milestones that person has yet to reach on the calendar, counting from person.time_since_infection
+        periods ago, which is zero unless they are being seeded partway through their disease
+        """
+        person.infected_period = self.now - person.time_since_infection
+        for periods, days in self.milestones(person):
+            if periods > person.time_since_infection:
+                self.buckets[person.infected_period + periods].append((person.idx, periods, days))
+
+    def passed(self, person):
+        """
+        :return: the (periods, days) of the milestones that person had reached when they were scheduled
+        """
+        return [(periods, days) for periods, days in self.milestones(person)
+                if periods <= person.time_since_infection]
+
+    @staticmethod
+    def milestones(person):
+        """
+        :return: in order, the (periods, days) since infection at which update_disease does something.
+        Like the polling in Person.update_state, this skips days that are not a whole number of periods.
+        """
+        episodes_per_day = person.society.episodes_per_day
+        milestones = {}
+        for days in person.disease_milestones():
+            periods = round(days * episodes_per_day)
+            if periods >= 1 and periods / episodes_per_day == days:
+                milestones[periods] = periods / episodes_per_day
+        return sorted(milestones.items())
+
+    def advance(self):
+        """
+        :return: the milestones that fall due in the new period
+        """
+        self.now += 1
+        return self.buckets.pop(self.now, [])
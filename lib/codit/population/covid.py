@@ -1,11 +1,11 @@
-import random
-
 from codit.population.person import Person
 
 
 class PersonCovid(Person):
-    def __init__(self, society, config=None, name=None):
-        Person.__init__(self, society, config=config, name=name)
+    __slots__ = ()
+
+    def __init__(self, society, config=None, name=None, idx=None):
+        Person.__init__(self, society, config=config, name=name, idx=idx)
         self._symptomatic = False
         self.has_tested_positive = False
 
@@ -15,7 +15,7 @@ class PersonCovid(Person):
 
     def set_infected(self, disease, infector=None):
         Person.set_infected(self, disease, infector=infector)
-        self.infectious = False
+        self.set_infectious(False)
 
     def update_disease(self, days):
         """
@@ -23,10 +23,10 @@ class PersonCovid(Person):
         """
         cov = self.disease
         if days == cov.days_before_infectious:
-            self.infectious = True
+            self.set_infectious(True)
 
         elif days == cov.days_before_infectious + cov.days_to_symptoms:
-            if random.random() < cov.prob_symptomatic:
+            if self.society.rng.random() < cov.prob_symptomatic:
                 self._symptomatic = True
                 self.react_to_new_symptoms()
 
@@ -34,22 +34,34 @@ class PersonCovid(Person):
             self._symptomatic = False
             self.recover()
 
+    def disease_milestones(self):
+        cov = self.disease
+        return [cov.days_before_infectious,
+                cov.days_before_infectious + cov.days_to_symptoms,
+                cov.days_before_infectious + cov.days_infectious]
+
     def react_to_new_symptoms(self):
-        if random.random() < self.cfg.PROB_ISOLATE_IF_SYMPTOMS:
+        if self.society.rng.random() < self.cfg.PROB_ISOLATE_IF_SYMPTOMS:
             self.isolate()
-        if random.random() < self.cfg.PROB_APPLY_FOR_TEST_IF_SYMPTOMS:
+        if self.society.rng.random() < self.cfg.PROB_APPLY_FOR_TEST_IF_SYMPTOMS:
             self.society.get_test_request(self, notes='symptoms')
 
     def update_time(self):
-        if random.random() < self.society.prob_worry:
-            self.react_to_new_symptoms()
+        if self.society.rng.random() < self.society.prob_worry:
+            self.worry()
         Person.update_time(self)
 
+    def worry(self):
+        """
+        Have symptoms that are not due to Covid
+        """
+        self.react_to_new_symptoms()
+
     def get_test_results(self, positive):
         if not positive:
             if self.isolating:
                 self.leave_isolation()
-        elif random.random() < self.cfg.PROB_ISOLATE_IF_TESTPOS:
+        elif self.society.rng.random() < self.cfg.PROB_ISOLATE_IF_TESTPOS:
             self.isolate()
 
     def consider_leaving_isolation(self):
@@ -0,0 +1,160 @@
+import itertools
+import numpy as np
+
+MAX_PAIRS_PER_CHUNK = 2 ** 22
+
+
+class CSR:
+    """
+    Rows of integer ids, stored in compressed sparse row form:
+    row i is indices[indptr[i]:indptr[i + 1]]
+    """
+    def __init__(self, indptr, indices):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        :param rows: an iterable of iterables of ids, eg. [{0, 4, 7}, {1, 2}]
+        """
+        rows = [list(r) for r in rows]
+        lengths = np.fromiter((len(r) for r in rows), dtype=np.int64, count=len(rows))
+        indices = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.int32, count=int(lengths.sum()))
+        return cls(np.concatenate([[0], np.cumsum(lengths)]), indices)
+
+    @classmethod
+    def from_pairs(cls, rows, cols, n_rows):
+        """
+        :return: the CSR whose row r holds, in order, the cols paired with r (rows must be sorted)
+        """
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n_rows))])
+        return cls(indptr, cols)
+
+    @classmethod
+    def concatenate(cls, csrs):
+        """
+        :return: the CSR with the rows of each of csrs in turn
+        """
+        lengths = [c.lengths() for c in csrs]
+        return cls(np.concatenate([[0], np.cumsum(np.concatenate(lengths))]),
+                   np.concatenate([c.indices for c in csrs]))
+
+    @classmethod
+    def partition(cls, members, sizes):
+        """
+        :return: the CSR cutting members into consecutive groups of the given sizes, the last cut short so that
+        there are no more than len(members) in all, and any groups beyond that left out
+        """
+        indptr = np.minimum(np.concatenate([[0], np.cumsum(sizes)]), len(members))
+        indptr = indptr[:int(np.searchsorted(indptr, len(members))) + 1]
+        return cls(indptr, members)
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def row(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def lengths(self):
+        return np.diff(self.indptr)
+
+    def take(self, rows):
+        """
+        :return: the CSR whose rows are the given rows of this one, in the order given
+        """
+        counts = self.lengths()[rows]
+        _, indices = expand_pairs(counts, self.indptr[rows], counts, self.indices)
+        return CSR(np.concatenate([[0], np.cumsum(counts)]), indices)
+
+    def row_ids(self):
+        """
+        :return: for each entry of self.indices, the row it belongs to
+        """
+        return np.repeat(np.arange(len(self), dtype=np.int32), self.lengths())
+
+    def transpose(self, n_cols):
+        """
+        :return: the CSR whose row j lists the rows of self containing j, eg. from cliques->people to people->cliques
+        """
+        order = np.argsort(self.indices, kind='stable')
+        return CSR.from_pairs(self.indices[order], self.row_ids()[order], n_cols)
+
+
+def contact_matrix(cliques, n_people):
+    """
+    :param cliques: a CSR from each clique to its members
+    :return: a CSR from each person to their contacts, ie. the other members of every clique they belong to,
+    each contact listed once and in order of idx
+    """
+    sizes = cliques.lengths()
+    keys = []
+    for first, last in _chunks(sizes ** 2):
+        pair_sizes = np.repeat(sizes[first:last], sizes[first:last])
+        starts = np.repeat(cliques.indptr[first:last], sizes[first:last])
+        members = cliques.indices[cliques.indptr[first]:cliques.indptr[last]]
+        left, right = expand_pairs(members, starts, pair_sizes, cliques.indices)
+        distinct = left != right
+        keys.append(_sorted_unique(left[distinct].astype(np.int64) * n_people + right[distinct]))
+    keys = _sorted_unique(np.concatenate(keys)) if keys else np.zeros(0, dtype=np.int64)
+    return CSR.from_pairs(keys // n_people, keys % n_people, n_people)
+
+
+def expand_pairs(left, starts, counts, pool):
+    """
+    :return: every pair (left[k], pool[starts[k] + m]) for m in range(counts[k])
+    """
+    total = int(counts.sum())
+    offsets = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(left, counts), pool[np.repeat(starts, counts) + offsets]
+
+
+def _sorted_unique(keys):
+    keys = np.sort(keys)
+    if len(keys) == 0:
+        return keys
+    return keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+
+
+def _chunks(weights, max_weight=MAX_PAIRS_PER_CHUNK):
+    """
+    :return: consecutive (first, last) ranges of the weights, each of total weight about max_weight
+    """
+    cumulative = np.cumsum(weights)
+    first = 0
+    while first < len(weights):
+        done = cumulative[first - 1] if first else 0
+        last = max(first + 1, int(np.searchsorted(cumulative, done + max_weight, side='right')))
+        yield first, last
+        first = last
+
+
+class ContactNetwork:
+    """
+    Who is in contact with whom, held as a CSR over person.idx
+    """
+    def __init__(self, contacts, people):
+        self.csr = contacts
+        self.people = people
+        self.valencies = contacts.lengths()
+
+    def __len__(self):
+        return len(self.csr)
+
+    def contacts_of(self, person):
+        return tuple(map(self.people.__getitem__, self.csr.row(person.idx).tolist()))
+
+    def valency_of(self, person):
+        return int(self.valencies[person.idx])
+
+    def susceptible_contact_counts(self, susceptible):
+        """
+        :param susceptible: a boolean array over person.idx
+        :return: arrays over person.idx of the number of susceptible contacts of each person, and of the number of
+        susceptible contacts of those susceptible contacts (counting repeats, and the person themselves)
+        """
+        rows = self.csr.row_ids()
+        hit = susceptible[self.csr.indices]
+        n_susceptible = np.bincount(rows, weights=hit, minlength=len(self)).astype(np.int64)
+        n_second = np.bincount(rows, weights=hit * n_susceptible[self.csr.indices], minlength=len(self))
+        return n_susceptible, n_second.astype(np.int64)
@@ -1,150 +1,195 @@
-import random
 import numpy as np
 import logging
 
+from codit.population.network import CSR
 from codit.population.population import FixedNetworkPopulation
 from codit.population.networks import household_workplace
 from codit.population.networks.city_config.city_cfg import MINIMUM_WORKING_AGE, MAXIMUM_WORKING_AGE, MAXIMUM_CLASS_AGE, MINIMUM_CLASS_AGE, AVERAGE_HOUSEHOLD_SIZE
 from codit.population.networks.city_config.typical_households import build_characteristic_households
 
 EPHEMERAL_CONTACT = 0.1  # people per day
+CLIQUE_KINDS = ('households', 'workplaces', 'classrooms', 'care_homes', 'ephemeral')
 
 
 class CityPopulation(FixedNetworkPopulation):
     def fix_cliques(self, encounter_size):
         """
         :param encounter_size: not used
-        :return:
+        :return: a CSR of the cliques, in the order of CLIQUE_KINDS, and self.clique_kinds gives the kind of each
         """
-        static_cliques = build_city_cliques(self.people)
-        logging.info(f"Adding {len(static_cliques)} permanent contact groups")
+        groups = build_city_clique_groups(self.people, self.rng)
+        logging.info(f"Adding {sum(len(g) for g in groups)} permanent contact groups")
         dynamic_cliques = FixedNetworkPopulation.fix_cliques(self, EPHEMERAL_CONTACT)
         logging.info(f"Adding {len(dynamic_cliques)} ephemeral contact pairs")
-        return static_cliques + dynamic_cliques
+        groups.append(CSR.from_rows(sorted(p.idx for p in clique) for clique in dynamic_cliques))
+        self.clique_kinds = np.repeat(np.arange(len(groups), dtype=np.int8), [len(g) for g in groups])
+        return CSR.concatenate(groups)
 
 
-def build_city_cliques(people):
+def build_city_cliques(people, rng):
     """
     :param people: a list of population.covid.PersonCovid() objects
+    :param rng: a RandomStream
     :return: a list of little sets, each is a 'clique' in the graph, some are households, some are workplaces
     each individual should belong to exactly one household and one workplace
     for example: [{person_0, person_1, person_2}, {person_0, person_10, person_54, person_88, person_550, person_270}]
     - except not everyone is accounted for of course
     """
-    households = build_households(people)
-    report_size(households, 'households')
+    cliques = CSR.concatenate(build_city_clique_groups(people, rng))
+    return [set(map(people.__getitem__, cliques.row(i).tolist())) for i in range(len(cliques))]
+
 
-    classrooms = build_class_groups(people)
+def build_city_clique_groups(people, rng):
+    """
+    :return: CSRs over person.idx of the households, workplaces, classrooms and care homes (which are also
+    households), having given everyone an age
+    """
+    households = build_households(people, rng)
+    ages = np.array([p.age for p in people], dtype=np.int32)
+    report_size(households, 'households')
 
-    working_age_people = [p for p in people if MINIMUM_WORKING_AGE < p.age < MAXIMUM_WORKING_AGE]
-    teachers = random.sample(working_age_people, len(classrooms))
-    classrooms = [clss | {teachers[i]} for i, clss in enumerate(classrooms)]
+    classrooms = build_class_groups(ages, rng)
+    working_age_people = np.flatnonzero((MINIMUM_WORKING_AGE < ages) & (ages < MAXIMUM_WORKING_AGE))
+    teachers = rng.permutation(working_age_people)[:len(classrooms)]
+    classrooms = append_to_rows(classrooms, teachers[:, None])
     report_size(classrooms, 'classrooms')
 
-    care_homes = [h for h in households if is_care_home(h)]
-    carers = assign_staff(care_homes, working_age_people)
+    care_homes = np.flatnonzero(care_home_rows(households, ages))
+    carers = assign_staff(len(care_homes), working_age_people, rng)
+    households = append_to_rows(households, carers, rows=care_homes)
+    care_homes = households.take(care_homes)
+    report_size(care_homes, 'care_homes')
 
-    working_age_people = list(set(working_age_people) - set(teachers) - set(carers))
-    random.shuffle(working_age_people)
-    workplaces = build_workplaces(working_age_people)
+    taken = np.zeros(len(people), dtype=bool)
+    taken[teachers] = True
+    taken[carers.ravel()] = True
+    working_age_people = rng.permutation(working_age_people[~taken[working_age_people]])
+    workplaces = build_workplaces(working_age_people, rng)
     report_size(workplaces, 'workplaces')
 
-    return households + workplaces + classrooms + care_homes
+    return [households, workplaces, classrooms, care_homes]
 
 
 def is_care_home(home):
     return min([p.age for p in home]) >= MAXIMUM_WORKING_AGE and len(home) > 20
 
 
-def assign_staff(care_homes, working_age_people, staff=5):
-    carers = set()
-    for home in care_homes:
-        home_carers = set(random.sample(working_age_people, staff))
-        home |= home_carers
-        carers |= home_carers
-    report_size(care_homes, 'care_homes')
-    return carers
-
-
-def report_size(care_homes, ch):
-    logging.info(f"{len(care_homes)} {ch} of mean size {np.mean([len(x) for x in care_homes]):2.2f}")
+def care_home_rows(households, ages):
+    """
+    :return: a boolean array over the rows of households, of those that are care homes, as in is_care_home
+    """
+    sizes = households.lengths()
+    youngest = np.full(len(households), -1)
+    occupied = sizes > 0
+    youngest[occupied] = np.minimum.reduceat(ages[households.indices], households.indptr[:-1][occupied])
+    return (youngest >= MAXIMUM_WORKING_AGE) & (sizes > 20)
 
 
-def build_class_groups(people):
-    classrooms = []
-    for kids_age in range(MINIMUM_CLASS_AGE, MAXIMUM_CLASS_AGE+1):
-        schoolkids = [p for p in people if p.age == kids_age]
-        random.shuffle(schoolkids)
-        classrooms += build_workplaces(schoolkids, classroom_size=30)
-    logging.info(f"Only putting children >{MINIMUM_CLASS_AGE} years old into classrooms.")
-    return classrooms
+def assign_staff(n_homes, working_age_people, rng, staff=5):
+    """
+    :return: an array of shape (n_homes, staff) of the carers of each home, each home's carers all different
+    """
+    carers = rng.integers(len(working_age_people), size=(n_homes, staff))
+    repeated = np.flatnonzero((np.diff(np.sort(carers, axis=1), axis=1) == 0).any(axis=1))
+    while len(repeated):
+        carers[repeated] = rng.integers(len(working_age_people), size=(len(repeated), staff))
+        repeated = repeated[(np.diff(np.sort(carers[repeated], axis=1), axis=1) == 0).any(axis=1)]
+    return working_age_people[carers]
 
 
-def build_households(people):
+def append_to_rows(csr, extra, rows=None):
     """
-    :param people: a list of population.covid.PersonCovid() objects
-    :return: a list of households, where households are a list of person objects. now with an assigned age.
+    :param extra: an array with a row of ids to add to each of the rows of csr, or of the given rows
+    :return: a new CSR, with each row followed by its extra ids
     """
-    n_individuals = len(people)
-    assigned = 0
-    households = []
-
-    num_h = int(n_individuals / AVERAGE_HOUSEHOLD_SIZE)
-    household_examples = build_characteristic_households(num_h)
+    counts = np.zeros(len(csr), dtype=np.int64)
+    counts[slice(None) if rows is None else rows] = extra.shape[1]
+    indptr = csr.indptr + np.concatenate([[0], np.cumsum(counts)])
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    old = np.ones(indptr[-1], dtype=bool)
+    old[np.repeat(indptr[1:] - counts, counts) + within] = False
+    indices = np.empty(indptr[-1], dtype=csr.indices.dtype)
+    indices[old] = csr.indices
+    indices[~old] = extra.ravel()
+    return CSR(indptr, indices)
 
-    while assigned < n_individuals:
-        ages = next_household_ages(household_examples)
-        size = len(ages)
 
-        if assigned + size > n_individuals:
-            ages = ages[:n_individuals - assigned - size]
-            size = len(ages)
+def report_size(groups, ch):
+    logging.info(f"{len(groups)} {ch} of mean size {np.mean(groups.lengths()):2.2f}")
 
-        hh = []
-        for j, age in enumerate(ages):
-            indiv = people[j + assigned]
-            indiv.age = age
-            hh.append(indiv)
-        households.append(set(hh))
-        assigned += size
 
-    return households
+def build_class_groups(ages, rng):
+    """
+    :param ages: an array of everyone's age
+    :return: a CSR of classrooms, each of up to 30 children of the same age, in random order
+    """
+    kids = np.flatnonzero((MINIMUM_CLASS_AGE <= ages) & (ages <= MAXIMUM_CLASS_AGE))
+    kids = rng.permutation(kids)
+    kids = kids[np.argsort(ages[kids], kind='stable')]
+    per_age = np.bincount(ages[kids] - MINIMUM_CLASS_AGE, minlength=MAXIMUM_CLASS_AGE - MINIMUM_CLASS_AGE + 1)
+    sizes = np.concatenate([class_sizes(n, 30) for n in per_age.tolist()]).astype(np.int64)
+    logging.info(f"Only putting children >{MINIMUM_CLASS_AGE} years old into classrooms.")
+    return CSR.partition(kids, sizes)
 
 
-def next_household_ages(household_list):
+def class_sizes(n, size):
     """
-    :param: complete list of households
-    :return: randomly select a type of household from a distribution suitable to City,
-    and return the list of the ages of the people in that household
+    :return: the sizes of classes of size, and one smaller class of what is left over, that hold n in all
     """
-    return random.choice(household_list)
+    return [size] * (n // size) + ([n % size] if n % size else [])
 
 
-def build_workplaces(people, classroom_size=-1):
+def build_households(people, rng):
     """
-    :param people: lets for now let these be a list of N population.covid.PersonCovid() objects
-    :return: a list of workplaces, where workplaces are a list of person objects.
+    :param people: a list of population.covid.PersonCovid() objects
+    :param rng: a RandomStream
+    :return: a CSR of households over person.idx, in which household i is made of the people from
+    households.indptr[i] up to households.indptr[i + 1]. Everyone is given the age their household needs.
     """
     n_individuals = len(people)
-    assigned = 0
-    workplaces = []
-    while assigned < n_individuals:
-        if classroom_size > 0:
-            size = 30
-        else:
-            size = next_workplace_size()
+    num_h = int(n_individuals / AVERAGE_HOUSEHOLD_SIZE)
+    household_examples = build_characteristic_households(rng, num_h)
+    households = next_households(household_examples, n_individuals, rng)
 
-        if assigned + size >= n_individuals:
-            size = n_individuals - assigned
+    for person, age in zip(people, households.indices.tolist()):
+        person.age = age
+    return CSR(households.indptr, np.arange(n_individuals))
 
-        assert size > 0
 
-        hh = people[assigned: assigned + size]
-        workplaces.append(set(hh))
-        assigned += size
+def next_households(household_examples, n_individuals, rng):
+    """
+    :param household_examples: a CSR of the ages in each household of a distribution suitable to City
+    :return: a CSR of households drawn at random from the examples, with the last cut short so that they hold
+    n_individuals people in all
+    """
+    sizes = household_examples.lengths()
+    chosen = np.zeros(0, dtype=np.int64)
+    while sizes[chosen].sum() < n_individuals:
+        more = int((n_individuals - sizes[chosen].sum()) / sizes.mean()) + 1
+        chosen = np.concatenate([chosen, rng.integers(len(sizes), size=more)])
+    households = household_examples.take(chosen)
+    return CSR.partition(households.indices[:n_individuals], households.lengths())
 
-    return workplaces
 
+def build_workplaces(people, rng, classroom_size=-1):
+    """
+    :param people: an array of the person.idx of those to put into workplaces, in the order to fill them
+    :return: a CSR of workplaces over person.idx
+    """
+    if classroom_size > 0:
+        sizes = np.full(len(people) // classroom_size + 1, classroom_size)
+    else:
+        sizes = group_sizes(len(people), household_workplace.WORKPLACE_SIZE_REPRESENTATIVE_EXAMPLES, rng)
+    return CSR.partition(np.asarray(people), sizes)
 
-def next_workplace_size():
-    return random.choice(household_workplace.WORKPLACE_SIZE_REPRESENTATIVE_EXAMPLES)
+
+def group_sizes(n_individuals, examples, rng):
+    """
+    :return: an array of sizes drawn at random from examples, until there is room for n_individuals
+    """
+    examples = np.asarray(examples)
+    sizes = np.zeros(0, dtype=np.int64)
+    while sizes.sum() < n_individuals:
+        more = int((n_individuals - sizes.sum()) / examples.mean()) + 1
+        sizes = np.concatenate([sizes, examples[rng.integers(len(examples), size=more)]])
+    return sizes
@@ -1,123 +1,116 @@
 import logging
-import random
 import numpy as np
 
+from codit.population.network import CSR
 from codit.population.networks.city_config import city_cfg as cfg
 
 
-def build_characteristic_households(total_h=50000):
+def build_characteristic_households(rng, total_h=50000):
     """
+    :param: rng - a RandomStream
     :param: total_h - total number of example households to build *NOTE* this must be >10000 as CARE_HOME_RATE = 0.0004
-    :return: a list of lists of ages
+    :return: a CSR, in which row i is the ages of the people in household i
     :approach:
-        - build a list for each category
-        - each category should create a list of households w respect ot data
-        - each household is a list of people with an age
+        - build the households of each category at once, as arrays
+        - each category should draw its number of households, their sizes and ages w respect ot data
     """
     logging.info(f"Building a set of {total_h} households from which to build a population")
 
-    one = house(total_h * cfg.ONE_PERSON_RATE, cfg.OVER_25_WEIGHT, house_size=1)
-    pair = house(round(total_h * cfg.TWO_PERSON_RATE), cfg.ADULT_WEIGHT, house_size=2)
-    sen_pair = house(total_h * cfg.TWO_SENIOR_PERSON_RATE, cfg.SENIOR_WEIGHT, house_size=2)
-    sen_triple = house(total_h * cfg.OTHER_SENIOR_PERSON_RATE, cfg.SENIOR_WEIGHT, house_size=3)
+    one = house(total_h * cfg.ONE_PERSON_RATE, cfg.OVER_25_WEIGHT, rng, house_size=1)
+    pair = house(round(total_h * cfg.TWO_PERSON_RATE), cfg.ADULT_WEIGHT, rng, house_size=2)
+    sen_pair = house(total_h * cfg.TWO_SENIOR_PERSON_RATE, cfg.SENIOR_WEIGHT, rng, house_size=2)
+    sen_triple = house(total_h * cfg.OTHER_SENIOR_PERSON_RATE, cfg.SENIOR_WEIGHT, rng, house_size=3)
     par_w_d = poisson_house(total_h * cfg.PAREN_W_DEPENDENT_RATE, cfg.CHILD_WEIGHT,
-                            cfg.AVERAGE_NUMBER_OF_CHILDREN,
+                            cfg.AVERAGE_NUMBER_OF_CHILDREN, rng,
                             case=1, weight_2=cfg.PARENT_WEIGHT)
     fam_w_d = poisson_house(total_h * cfg.FAMILY_W_DEPENDENT_RATE, cfg.CHILD_WEIGHT,
-                            cfg.AVERAGE_NUMBER_OF_CHILDREN,
+                            cfg.AVERAGE_NUMBER_OF_CHILDREN, rng,
                             case=2, weight_2=cfg.PARENT_WEIGHT)
     par_w_non_d = poisson_house(total_h * cfg.PAREN_W_NON_DEPENDENT_RATE, cfg.ADULT_WEIGHT,
-                                cfg.AVERAGE_NUMBER_OF_CHILDREN,
+                                cfg.AVERAGE_NUMBER_OF_CHILDREN, rng,
                                 case=1, weight_2=cfg.GROWNUP_PARENT_WEIGHT)
     fam_w_non_d = poisson_house(total_h * cfg.FAMILY_W_NON_DEPENDENT_RATE, cfg.ADULT_WEIGHT,
-                                cfg.AVERAGE_NUMBER_OF_CHILDREN,
+                                cfg.AVERAGE_NUMBER_OF_CHILDREN, rng,
                                 case=2, weight_2=cfg.GROWNUP_PARENT_WEIGHT)
-    students = poisson_house(total_h * cfg.STUDENT_HOUSEHOLD_RATE, cfg.STUDENT_WEIGHT, cfg.AVERAGE_STUDENT_HOME_SIZE)
-    care_home = poisson_house(total_h * cfg.CARE_HOME_RATE, cfg.SENIOR_WEIGHT, cfg.AVERAGE_CARE_HOME_SIZE)
-    other = house(total_h * cfg.OTHER_HOUSEHOLD_RATE, cfg.ADULT_WEIGHT, a=2, b=4)
+    students = poisson_house(total_h * cfg.STUDENT_HOUSEHOLD_RATE, cfg.STUDENT_WEIGHT, cfg.AVERAGE_STUDENT_HOME_SIZE,
+                             rng)
+    care_home = poisson_house(total_h * cfg.CARE_HOME_RATE, cfg.SENIOR_WEIGHT, cfg.AVERAGE_CARE_HOME_SIZE, rng)
+    other = house(total_h * cfg.OTHER_HOUSEHOLD_RATE, cfg.ADULT_WEIGHT, rng, a=2, b=4)
 
-    all_houses = one + pair + sen_pair + sen_triple + par_w_d + fam_w_d + par_w_non_d + fam_w_non_d + students + care_home + other
-    return all_houses
+    return CSR.concatenate([one, pair, sen_pair, sen_triple, par_w_d, fam_w_d, par_w_non_d, fam_w_non_d, students,
+                            care_home, other])
 
 
-def house(n, weights, house_size=None, a=0, b=0):
+def house(n, weights, rng, house_size=None, a=0, b=0):
     """
     :param n: the number of houses to build [not just building 1 in this method]
     :param weights: these weights are used to determine the ages of the inhabitants
+    :param rng: a RandomStream
     :param house_size: if not None: we are building houses of this size
-    :param a, b: if not None then these determine the min and max sizes from which to draw house size uniformly
-    :return: a list of households, in turn each household is a list of ages
+    :param a, b: if house_size is None then these are the min and max sizes from which to draw each house size uniformly
+    :return: a CSR of households, in which row i is the ages of the people in household i
     """
-    h = []
+    n = int(n)
+    if house_size is None:
+        sizes = rng.integers(a, b + 1, size=n)
+    else:
+        sizes = np.full(n, house_size)
+    return CSR(np.concatenate([[0], np.cumsum(sizes)]), pick_age(int(sizes.sum()), weights, rng))
 
-    for x in range(0, int(n)):
-        if house_size is None:
-            house_size = random.randint(a, b)
-        inside_list = pick_age(house_size, weights)
-        h += [inside_list]
 
-    return h
-
-
-def poisson_house(n, weight, lam, case=None, weight_2=None):
+def poisson_house(n, weight, lam, rng, case=None, weight_2=None):
     """
     :param n: is number of households to create based on desired rate
     :param weight: these weights are used to determine the ages of the inhabitants
     :param lam: lam we want to use in the poisson. i.e. the average size of household
+    :param rng: a RandomStream
     :param case: if not None this determines the number of people to create and give an age
     :param weight_2: if not None these are desired weights (age range) for case
-    :return: a list of households, in turn each household is a list of people (with an age)
+    :return: a CSR of households, in which row i is the ages of the people in household i, those drawn from
+    weight first and then those drawn from weight_2
     """
-    h = []
-    pd = truncated_poisson(lam, int(n))  # creates poisson dist. based on lambda and n
-
-    for x in range(0, int(n)):
-        val_poisson = int(pd[x])
-        inside_list = pick_age(val_poisson, weight)
+    n = int(n)
+    first = truncated_poisson(lam, n, rng)  # creates poisson dist. based on lambda and n
+    sizes = first + (case or 0)
+    indptr = np.concatenate([[0], np.cumsum(sizes)])
+    position = np.arange(indptr[-1]) - np.repeat(indptr[:-1], sizes)
+    in_first = position < np.repeat(first, sizes)
 
-        if case is not None:
-            inside_list += pick_age(case, weight_2)
+    ages = np.empty(indptr[-1], dtype=np.int32)
+    ages[in_first] = pick_age(int(in_first.sum()), weight, rng)
+    if case is not None:
+        ages[~in_first] = pick_age(int((~in_first).sum()), weight_2, rng)
+    return CSR(indptr, ages)
 
-        h += [inside_list]
 
-    return h
-
-
-def pick_age(num_people, weights):
+def pick_age(num_people, weights, rng):
     """
-    :param num_people: number of people in the household we want to give an age to
+    :param num_people: number of people we want to give an age to
     :param weights: these weights are used to determine the ages of the inhabitants
-    :return: a list of ages with ages based on the weights provided, k is count of person #
+    :return: an array of ages based on the weights provided
     """
-    inside_list, n = [], 0
-    while n < num_people:
-        rand = random.randint(0, len(weights) - 1)
-        age = age_randomizer(weights[rand])
-        inside_list += [age]
-        n += 1
-
-    return inside_list
+    decades = np.array(weights, dtype=np.int32)[rng.integers(len(weights), size=num_people)]
+    return age_randomizer(decades, rng)
 
 
-def truncated_poisson(lam, size):
+def truncated_poisson(lam, size, rng):
     """
     :param lam: lam we want to use in the poisson. i.e. the average size of household
     :param size: number of households to create
-    :return: a poisson dist. (as a list) truncated such that min is zero
+    :return: an array of poisson draws, redrawing any that are zero
     """
-    poissons = np.zeros(size)
-    while min(poissons) == 0:
-        new_poissons = np.random.poisson(lam, size=size)
-        poissons[poissons < 1] = new_poissons[poissons < 1]
+    poissons = rng.poisson(lam, size=size)
+    zero = np.flatnonzero(poissons == 0)
+    while len(zero):
+        poissons[zero] = rng.poisson(lam, size=len(zero))
+        zero = zero[poissons[zero] == 0]
     return poissons
 
 
-def age_randomizer(x):
+def age_randomizer(x, rng):
     """
-    :param x: range of age based on weights.
-    :return: a random age (int) in a fairly small range
+    :param x: an array of the ranges of age based on weights
+    :return: an array of random ages (ints), each in a fairly small range from x
     """
-    x = int(x)
-    if x < 20 or (25 < x < 85):
-        return random.randint(x, x + 9)
-    return random.randint(x, x + 4)
+    spans = np.where((x < 20) | ((25 < x) & (x < 85)), 10, 5)
+    return x + (rng.random(len(x)) * spans).astype(np.int32)
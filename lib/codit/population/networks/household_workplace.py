@@ -1,10 +1,9 @@
-import networkx as nx
-import random
 import itertools
 import numpy as np
 import logging
 
 from codit.population import FixedNetworkPopulation
+from codit.population.network import CSR, contact_matrix
 
 _h = []
 for i in range(6):
@@ -17,41 +16,81 @@ WORKPLACE_SIZE_REPRESENTATIVE_EXAMPLES = _h
 
 class HouseholdWorkplacePopulation(FixedNetworkPopulation):
     def fix_cliques(self, mean_num_contacts, mean_household_size=2):
-        return build_cliques(self.people)
+        return build_cliques(self.people, self.rng)
 
 
-def build_cliques(people):
-
+def build_cliques(people, rng):
+    """
+    :return: a CSR over person.idx of the cliques of the network in which everyone meets their household and their
+    workplace. These are the maximal cliques of the graph joining the members of each group, which are just the
+    groups of two or more people that are not part of a bigger group, so we find them from the groups themselves
+    """
+    n = len(people)
     logging.info("Building households")
-    household_graph = partition_graph(len(people), HOUSEHOLD_SIZES_OF_REPRESENTATIVE_PEOPLE, 1, 0)
-    node_mapping = {i: people[i] for i in range(len(people))}
-    households = nx.relabel_nodes(household_graph, node_mapping)
+    households = CSR.partition(np.arange(n), partition_sizes(n, HOUSEHOLD_SIZES_OF_REPRESENTATIVE_PEOPLE, rng,
+                                                             per_population=False))
     logging.info("Done households, now moving on to workplaces")
-
-    workplace_graph = partition_graph(len(people), WORKPLACE_SIZE_REPRESENTATIVE_EXAMPLES, 1, 0)
-    workplaces = nx.relabel_nodes(workplace_graph, get_shuffle_mapping(people))
+    workplaces = CSR.partition(rng.permutation(n), partition_sizes(n, WORKPLACE_SIZE_REPRESENTATIVE_EXAMPLES, rng,
+                                                                   per_population=False))
 
     logging.info("Composing households and workplaces")
-    full_graph = nx.compose_all([households, workplaces])
-    return [set(x) for x in nx.find_cliques(full_graph)]
+    household_of, workplace_of = group_of(households, n), group_of(workplaces, n)
+    # drop a household within one workplace, and a workplace within one household unless they are the same
+    keep_households = (households.lengths() > 1) & ~within_one(households, workplace_of)
+    household_sizes = households.lengths()[household_of[workplaces.indices[workplaces.indptr[:-1]]]]
+    keep_workplaces = (workplaces.lengths() > 1) & ~(within_one(workplaces, household_of) &
+                                                     (workplaces.lengths() < household_sizes))
+    return CSR.concatenate([households.take(np.flatnonzero(keep_households)),
+                            workplaces.take(np.flatnonzero(keep_workplaces))])
+
+
+def group_of(groups, n_people):
+    """
+    :param groups: a CSR partitioning range(n_people)
+    :return: an array over person.idx of the group each person is in
+    """
+    group = np.empty(n_people, dtype=np.int64)
+    group[groups.indices] = groups.row_ids()
+    return group
+
 
+def within_one(groups, other_group_of):
+    """
+    :param other_group_of: an array over person.idx of the group each person belongs to in another partition
+    :return: a boolean array over the rows of groups, of those whose members all belong to the same other group
+    """
+    other = other_group_of[groups.indices]
+    starts = groups.indptr[:-1]
+    return np.minimum.reduceat(other, starts) == np.maximum.reduceat(other, starts)
 
-def get_shuffle_mapping(people):
-    shuffled_population = [p for p in people]
-    random.shuffle(shuffled_population)
-    return {i: shuffled_population[i] for i in range(len(people))}
+
+def to_networkx(cliques, n_people):
+    """
+    :param cliques: a CSR over person.idx
+    :return: a networkx Graph, with an edge between every pair of people who share a clique. networkx is only needed
+    for this, so is imported here
+    """
+    import networkx as nx
+    contacts = contact_matrix(cliques, n_people)
+    graph = nx.Graph()
+    graph.add_nodes_from(range(n_people))
+    graph.add_edges_from(zip(contacts.row_ids().tolist(), contacts.indices.tolist()))
+    return graph
 
 
-def partition_graph(n, samples, p_in, p_out, directed=False, seed=None, per_population=False):
+def partition_graph(n, samples, p_in, p_out, rng, directed=False, per_population=False):
+    import networkx as nx
+    seed = int(rng.integers(2 ** 32))
     if p_in == p_out:
-        return nx.erdos_renyi_graph(n, p_in)
-    sizes = partition_sizes(n, samples, per_population=per_population)
+        return nx.erdos_renyi_graph(n, p_in, seed=seed)
+    sizes = partition_sizes(n, samples, rng, per_population=per_population).tolist()
     if (p_in, p_out) == (1, 0):
         return build_nx_graph(sizes)
     return nx.random_partition_graph(sizes, p_in, p_out, seed=seed, directed=directed)
 
 
 def build_nx_graph(sizes):
+    import networkx as nx
     G = nx.Graph()
     counter = 0
     for s in sizes:
@@ -62,28 +101,24 @@ def build_nx_graph(sizes):
     return G
 
 
-def partition_sizes(n_individuals, representative_samples, per_population=True):
+def partition_sizes(n_individuals, representative_samples, rng, per_population=True):
     """
     :param n_individuals: number of nodes in this network
     :param representative_samples: [group_size(i) for i in reasonable_sample(population)]
+    :param rng: a RandomStream
     :param per_population: if False, then representative_samples is rather [size(g) for g in reasonable_sample(groups)]
-    :return:
+    :return: an array of group sizes, taken in turn from the shuffled samples, the last cut short so that they
+    add up to n_individuals
     """
     if per_population:
         size_samples = list(itertools.chain(*([i] * (sum(representative_samples) // i) for i in representative_samples)))
     else:
         size_samples = representative_samples.copy()
-    random.shuffle(size_samples)
+    rng.shuffle(size_samples)
     logging.info(f"Mean size is {np.mean(size_samples)}")
-    assigned = 0
-    sizes = []
-    i = 0
-    while True:
-        size = size_samples[i % len(size_samples)]
-        if assigned + size >= n_individuals:
-            sizes.append(n_individuals - assigned)
-            break
-        assigned += size
-        sizes.append(size)
-        i += 1
+    size_samples = np.array(size_samples, dtype=np.int64)
+    sizes = np.tile(size_samples, n_individuals // size_samples.sum() + 1)
+    last = int(np.searchsorted(np.cumsum(sizes), n_individuals))
+    sizes = sizes[:last + 1]
+    sizes[-1] = n_individuals - sizes[:-1].sum()
     return sizes
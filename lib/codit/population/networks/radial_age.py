@@ -1,43 +1,144 @@
-import random
-
 import numpy as np
 
 from codit.population import FixedNetworkPopulation
+from codit.population.network import CSR
+
+CANDIDATES_PER_PLACE = 3  # times max_group_size: the people near each clique centre from whom its members are drawn
+DRAWING_ROUNDS = 3        # of drawing them, before looking at everyone near a clique centre instead
 
 
 class RadialAgePopulation(FixedNetworkPopulation):
 
     def fix_cliques(self, mean_num_contacts, group_size=2, radius=15, max_group_size=40, max_age=80):
-        return build_cliques(self.people, max_age, radius, max_group_size, mean_num_contacts)
+        return build_cliques(self.people, max_age, radius, max_group_size, mean_num_contacts, self.rng)
+
+
+def build_cliques(people, max_age, radius, max_group_size, mean_num_contacts, rng):
+    """
+    :return: a CSR over person.idx of cliques, each of the people within radius of a random place, until there are
+    mean_num_contacts for each person
+    """
+    coord = locate_population(people, rng)
+    return neighbour_cliques(coord, max_age + radius, radius, max_group_size, mean_num_contacts * len(people), rng)
+
+
+def locate_population(people, rng):
+    """
+    :return: an array of shape (n, 2) of where everyone is, at a distance from the centre of their age, which
+    this gives them
+    """
+    degrees = rng.random(len(people)) * 2 * np.pi
+    ages = rng.random(len(people)) * 60 + 20
+    for person, age in zip(people, ages.tolist()):
+        person.age = age
+    return ages[:, None] * np.stack([np.sin(degrees), np.cos(degrees)], axis=1)
+
+
+class Grid:
+    """
+    A spatial index of points, in square cells of side radius, so that everyone within radius of a place is in
+    the 3x3 cells around it
+    """
+    def __init__(self, coord, extent, radius):
+        self.extent = extent
+        self.radius = radius
+        self.n_side = int(np.ceil(2 * extent / radius)) + 1
+        cells = self.cell_of(coord)
+        order = np.argsort(cells, kind='stable')
+        self.cells = CSR.from_pairs(cells[order], order, self.n_side ** 2)
+
+    def cell_of(self, coord):
+        xy = np.clip(((coord + self.extent) // self.radius).astype(np.int64), 0, self.n_side - 1)
+        return xy[:, 0] * self.n_side + xy[:, 1]
 
+    def blocks(self, places):
+        """
+        :return: arrays of shape (len(places), 9) of the cells around each place, and how many people are in each
+        """
+        xy = np.clip(((places + self.extent) // self.radius).astype(np.int64), 0, self.n_side - 1)
+        dx, dy = np.meshgrid([-1, 0, 1], [-1, 0, 1])
+        x, y = xy[:, 0, None] + dx.ravel(), xy[:, 1, None] + dy.ravel()
+        inside = (0 <= x) & (x < self.n_side) & (0 <= y) & (y < self.n_side)
+        cells = np.where(inside, x * self.n_side + y, 0)
+        return cells, np.where(inside, self.cells.lengths()[cells], 0)
 
-def build_cliques(people, max_age, radius, max_group_size, mean_num_contacts):
-    n_people = len(people)
-    coord = locate_population(people)
-    groups = []
-    n_contacts = 0
-    max_contacts = mean_num_contacts * n_people
+
+def neighbour_cliques(coord, extent, radius, max_group_size, max_contacts, rng, batch_size=256):
+    """
+    Put cliques at random places in the square of side 2 * extent, a batch of places at a time, each made of up to
+    max_group_size of the people within radius of its place, until there are max_contacts
+    :return: a CSR of the cliques of two or more people
+    """
+    grid = Grid(coord, extent, radius)
+    n_candidates = CANDIDATES_PER_PLACE * max_group_size
+    batches, n_contacts, n_places = [], 0, 0
     while n_contacts < max_contacts:
-        location = np.random.uniform(-max_age - radius, max_age + radius, size=len(coord[0]))
-        grp = build_clique(location, radius, people, coord, max_group_size, n_people)
-        if (len(grp) > 1):  #  and (grp not in groups):
-            n_contacts += (len(grp) * (len(grp) - 1))
-            groups.append(grp)
-    return groups
-
-
-def locate_population(people):
-    coord = []
-    for person in people:
-        degree = random.random() * 2 * np.pi
-        person.age = random.random() * 60 + 20
-        coord.append(person.age * np.array([np.sin(degree), np.cos(degree)]))
-    return np.array(coord)
-
-
-def build_clique(location, radius, people, people_coordinates, max_group_size, population_size):
-    cidx = random.sample(range(population_size), max_group_size)
-    diffs = people_coordinates[cidx] - location
-    distances = np.sum(diffs ** 2, axis=1)
-    candidates = (people[ix] for ix in cidx)
-    return set([p for i, p in enumerate(candidates) if distances[i] < radius ** 2])
\ No newline at end of file
+        places = rng.uniform(-extent, extent, size=(batch_size, 2))
+        cliques = cliques_at(places, coord, grid, radius, max_group_size, n_candidates, rng)
+        sizes = cliques.lengths()
+        contacts = np.cumsum(sizes * (sizes - 1))
+        if n_contacts + contacts[-1] >= max_contacts:
+            cliques = cliques.take(np.arange(int(np.searchsorted(contacts, max_contacts - n_contacts)) + 1))
+        batches.append(cliques.take(np.flatnonzero(cliques.lengths() > 1)))
+        n_contacts += int(contacts[len(cliques) - 1])
+        n_places += len(cliques)
+        per_place = max(n_contacts / n_places, 1)
+        batch_size = int(np.clip((max_contacts - n_contacts) / per_place * 1.1 + 1, 64, 65536))
+    return CSR.concatenate(batches)
+
+
+def cliques_at(places, coord, grid, radius, max_group_size, n_candidates, rng):
+    """
+    :return: a CSR with a row for each place, of a random max_group_size of the people within radius of it, or of
+    all of them if there are fewer. Where there are more than n_candidates people in the cells around a place,
+    people are drawn from them, n_candidates at a time and with replacement, until max_group_size of those drawn
+    are within radius: taking them in the order they are first drawn makes a random sample, without replacement,
+    of those within radius. Otherwise, or if DRAWING_ROUNDS of draws have not found enough, everyone in the cells
+    is looked at, and those within radius are put in a random order
+    """
+    cells, counts = grid.blocks(places)
+    totals = counts.sum(axis=1)
+    before = np.cumsum(counts, axis=1) - counts
+
+    def people_at(place, drawn):
+        # find which of the place's cells each drawn position falls in, and who is there
+        k = (drawn[:, None] >= before[place]).sum(axis=1) - 1
+        return grid.cells.indices[grid.cells.indptr[cells[place, k]] + drawn - before[place, k]]
+
+    def near(place, person):
+        return ((coord[person] - places[place]) ** 2).sum(axis=1) < radius ** 2
+
+    place, drawn, order = (np.zeros(0, dtype=np.int64),) * 3
+    is_near = np.zeros(0, dtype=bool)
+    active = np.flatnonzero(totals > n_candidates)
+    for n_rounds in range(DRAWING_ROUNDS):
+        if not len(active):
+            break
+        new = np.repeat(active, n_candidates)
+        place = np.concatenate([place, new])
+        drawn = np.concatenate([drawn, (rng.random(len(new)) * totals[new]).astype(np.int64)])
+        order = np.concatenate([order, n_rounds * n_candidates + np.tile(np.arange(n_candidates), len(active))])
+        # keep the first draw of each person at each place
+        key = place * (int(totals.max()) + 1) + drawn
+        by_key = np.lexsort((order, key))
+        first = by_key[np.r_[True, key[by_key][1:] != key[by_key][:-1]]]
+        place, drawn, order = place[first], drawn[first], order[first]
+        is_near = near(place, people_at(place, drawn))
+        n_near = np.bincount(place[is_near], minlength=len(places))
+        active = active[n_near[active] < max_group_size]
+    drawn_enough = ~np.isin(place, active)
+    place, drawn, order = place[is_near & drawn_enough], drawn[is_near & drawn_enough], order[is_near & drawn_enough]
+
+    looked_at = np.concatenate([np.flatnonzero(totals <= n_candidates), active])
+    everyone = np.repeat(looked_at, totals[looked_at])
+    within = np.arange(len(everyone)) - np.repeat(np.cumsum(totals[looked_at]) - totals[looked_at], totals[looked_at])
+    everyone_near = near(everyone, people_at(everyone, within))
+    everyone, within = everyone[everyone_near], within[everyone_near]
+
+    place = np.concatenate([place, everyone])
+    person = people_at(place, np.concatenate([drawn, within]))
+    order = np.concatenate([order, rng.random(len(everyone))])
+    by_order = np.lexsort((order, place))
+    place, person = place[by_order], person[by_order]
+    kept = np.arange(len(place)) - np.searchsorted(place, place) < max_group_size
+    return CSR.from_pairs(place[kept], person[kept], len(places))
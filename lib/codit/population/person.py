@@ -1,9 +1,9 @@
-import random
-
 from codit.config import set_config
 
 
 class Isolation:
+    __slots__ = ('days_elapsed',)
+
     def __init__(self):
         self.days_elapsed = 0
 
@@ -12,13 +12,23 @@ class Isolation:
 
 
 class Person:
-    def __init__(self, society, config=None, name=None):
+    # what every kind of person keeps for themselves. The state that an ArrayPerson keeps in arrays instead, and
+    # anything else, like age, goes in the __dict__, which is only made for those who have something to put in it
+    __slots__ = ('idx', 'cfg', 'society', 'infected_period', 'disease', 'episode_time', 'name', 'network',
+                 'population', '__dict__')
+    arrays = None
+
+    def __init__(self, society, config=None, name=None, idx=None):
         set_config(self, config)
+        self.idx = idx
         self.society = society
+        self.network = None
+        self.population = None
         self.isolation = None
         self.infectious = False
         self.immune = False
         self.time_since_infection = 0
+        self.infected_period = None
         self.disease = None
         self.infector = None
         self.victims = set()
@@ -26,6 +36,13 @@ class Person:
         self.episode_time = 1. / self.society.episodes_per_day
         self.name = name
 
+    @classmethod
+    def create_people(cls, n_people, society):
+        """
+        :return: a list of n_people new people of this type, where the i-th person has idx i
+        """
+        return [cls(society, config=society.cfg.__dict__, name=f"person {i}", idx=i) for i in range(n_people)]
+
     def __repr__(self):
         if self.name is None:
             return f"Unnamed person"
@@ -35,54 +52,111 @@ class Person:
     def symptomatic(self):
         return self.infectious
 
+    @property
+    def contacts(self):
+        return self.network.contacts_of(self)
+
+    @property
+    def valency(self):
+        """
+        :return: the number of contacts of this person
+        """
+        return self.network.valency_of(self)
+
     def attack(self, other, days):
         if self.infectious:
             self.infectious_attack(other, days)
 
     def infectious_attack(self, other, days):
         if not other.infected:
-            if random.random() < self.disease.pr_transmit_per_day * days:
+            if self.society.rng.random() < self.disease.pr_transmit_per_day * days:
                 other.set_infected(self.disease, infector=self)
-                self.victims.add(other)
+                self.add_victim(other)
+
+    def add_victim(self, other):
+        self.victims.add(other)
 
     def set_infected(self, disease, infector=None):
         assert self.disease is None
         self.infected = True
-        self.infectious = True
+        self.set_infectious(True)
         self.disease = disease
         self.infector = infector
+        if self.population is not None:
+            self.population.on_infection(self)
+
+    def set_infectious(self, infectious):
+        """
+        Change whether this person is infectious, keeping count in their population
+        """
+        if infectious != self.infectious:
+            self.infectious = infectious
+            if self.population is not None:
+                self.population.on_infectious(self, infectious)
 
     def isolate(self):
         if self.isolation is None:
             self.isolation = Isolation()
+            if self.population is not None:
+                self.population.on_isolation(self, True)
 
     def leave_isolation(self):
         assert self.isolating
         self.isolation = None
+        if self.population is not None:
+            self.population.on_isolation(self, False)
 
     @property
     def isolating(self):
         return self.isolation is not None
 
     def recover(self):
-        self.infectious = False
+        self.set_infectious(False)
         self.immune = True
         self.disease = None
 
     def update_time(self):
+        self.update_state()
 
+    def update_state(self):
+        """
+        Move on this person's isolation and disease by one period
+        """
         if self.isolating:
             self.isolation.update_time(self.episode_time)
             self.consider_leaving_isolation()
 
-        if self.disease is not None:
+        if self.disease is not None and self.infected_period is None:
             self.time_since_infection += 1
             self.update_disease(self.days_infected())
-        else:
-            pass
+
+    @property
+    def quiescent(self):
+        """
+        :return: True if update_state() has nothing to do for this person
+        """
+        return not self.isolating and (self.disease is None or self.infected_period is not None)
+
+    def worry(self):
+        pass
 
     def days_infected(self):
-        return self.time_since_infection / self.society.episodes_per_day
+        return self.periods_infected() / self.society.episodes_per_day
+
+    def periods_infected(self):
+        """
+        :return: the periods since infection, or until recovery. If the population's DiseaseCalendar moves this
+        person's disease on, then time_since_infection is only brought up to date on its milestones.
+        """
+        if self.infected_period is not None and self.disease is not None:
+            return self.population.calendar.now - self.infected_period
+        return self.time_since_infection
+
+    def disease_milestones(self):
+        """
+        :return: the days since infection at which update_disease does something
+        """
+        return [self.disease.days_infectious]
 
     def consider_leaving_isolation(self):
         if self.isolation.days_elapsed > self.cfg.DURATION_OF_ISOLATION:
@@ -1,18 +1,81 @@
-import random
-from collections import defaultdict
+import math
 from codit.population.person import Person
+from codit.population.calendar import DiseaseCalendar
+from codit.disease import covid_hazard
+from codit.rng import as_stream
+from codit.population.network import CSR, ContactNetwork, contact_matrix
+from codit.population.cache import as_cache, network_arrays, restore_network
+from codit.population.transmission import PAIRWISE, VECTORIZED, PRESSURE, pairwise_infections, pressure_infections
 
 import numpy as np
 
 
+def hazard_of(person):
+    age = getattr(person, 'age', None)
+    return 0. if age is None else covid_hazard(age)
+
+
 class Population:
-    def __init__(self, n_people, society, person_type=None):
+
+    TRACK_ACTIVE = False
+    EVENT_DRIVEN = False
+
+    def __init__(self, n_people, society, person_type=None, track_active=None, event_driven=None, rng=None):
+        """
+        :param rng: the RandomStream (or seed) from which to build the population, and to draw its randomness
+        until an Outbreak gives it the stream of the simulation
+        :param track_active: if True, keep the set of people who are infected or isolating, and in each period
+        update only them, drawing everyone else's unnecessary worry in bulk. If None, this is given by the
+        class attribute TRACK_ACTIVE
+        :param event_driven: if True, schedule each person's disease milestones on a DiseaseCalendar when they are
+        infected, rather than polling update_disease every period. If None, this is given by the class
+        attribute EVENT_DRIVEN
+        """
         person_type = person_type or Person
-        self.people = [person_type(society, config=society.cfg.__dict__, name=f"person {i}") for i in range(n_people)]
+        self.rng = as_stream(rng)
+        self.society = society
+        self.people = person_type.create_people(n_people, society)
+        track_active = self.TRACK_ACTIVE if track_active is None else track_active
+        self.active = set() if track_active else None
+        event_driven = self.EVENT_DRIVEN if event_driven is None else event_driven
+        self.calendar = DiseaseCalendar() if event_driven else None
+        self.reset_counts()
+        self._potential_hazard = None
+        for p in self.people:
+            p.population = self
+
+    @property
+    def arrays(self):
+        """
+        :return: the PeopleArrays holding the state of our people, or None if each person holds their own state
+        """
+        return self.people[0].arrays if self.people else None
 
     def reset_people(self, society):
+        self.society = society
+        if self.active is not None:
+            self.active = set()
+        if self.calendar is not None:
+            self.calendar = DiseaseCalendar()
+        self.reset_counts()
         for person in self.people:
-            person.__init__(society, config=society.cfg.__dict__, name=person.name)
+            person.__init__(society, config=society.cfg.__dict__, name=person.name, idx=person.idx)
+
+    def reset_counts(self):
+        """
+        Counts of people in each state, kept up to date as people tell us of their changes in state
+        """
+        self.n_infected = 0
+        self.n_infectious = 0
+        self.n_isolating = 0
+        self.infected_hazard = 0.
+
+    def shared_with_copies(self):
+        """
+        :return: a dictionary from the id of each part of this population that never changes to the part itself,
+        which Outbreak.snapshot shares with its copy rather than copying
+        """
+        return {}
 
     def attack_in_groupings(self, group_size):
         groups = self.form_groupings(group_size)
@@ -27,29 +90,158 @@ class Population:
                         if p2 != p1:
                             p1.infectious_attack(p2, days=days)
 
+    def infect(self, victims, infectors):
+        """
+        :param victims: idx of the people who have just been infected
+        :param infectors: idx of the person who infected each of them
+        """
+        for v, i in zip(victims.tolist(), infectors.tolist()):
+            infector, victim = self.people[i], self.people[v]
+            victim.set_infected(infector.disease, infector=infector)
+            infector.add_victim(victim)
+
+    def state_masks(self):
+        """
+        :return: boolean arrays over person.idx, of who is infectious, who is susceptible and who is isolating
+        """
+        if self.arrays is not None:
+            return self.arrays.infectious, ~self.arrays.infected, self.arrays.isolating
+        n = len(self.people)
+        return (np.fromiter((p.infectious for p in self.people), dtype=bool, count=n),
+                np.fromiter((not p.infected for p in self.people), dtype=bool, count=n),
+                np.fromiter((p.isolating for p in self.people), dtype=bool, count=n))
+
+    def attack_probabilities(self, attackers):
+        """
+        :param attackers: a boolean array over person.idx
+        :return: an array over person.idx of the chance that each attacker infects each person they meet in a period
+        """
+        p_attack = np.zeros(len(self.people))
+        for i in np.flatnonzero(attackers):
+            p = self.people[i]
+            p_attack[i] = p.disease.pr_transmit_per_day / p.society.episodes_per_day
+        return p_attack
+
     def form_groupings(self, group_size):
-        return (random.sample(self.people, group_size) for _ in range(len(self.people)))
+        return (self.rng.sample(self.people, group_size) for _ in range(len(self.people)))
 
     def seed_infections(self, n_infected, disease, seed_periods=None):
         seed_periods = seed_periods or disease.days_infectious
-        for p in random.sample(self.people, n_infected):
+        for p in self.rng.sample(self.people, n_infected):
+            if self.calendar is not None:
+                self.seed_on_calendar(p, disease, self.rng.random() * seed_periods)
+                continue
             p.set_infected(disease)
-            stage = random.random() * seed_periods
+            stage = self.rng.random() * seed_periods
             while p.days_infected() < stage:
                 p.update_time()
 
+    def seed_on_calendar(self, person, disease, stage):
+        """
+        Infect person as if it happened enough periods ago that they are at least stage days into the disease,
+        then catch up at once on the milestones they have passed
+        """
+        episodes_per_day = person.society.episodes_per_day
+        periods = math.ceil(stage * episodes_per_day)
+        while periods / episodes_per_day < stage:
+            periods += 1
+        person.time_since_infection = periods
+        person.set_infected(disease)
+        for periods, days in self.calendar.passed(person):
+            self.progress_disease(person, periods, days)
+
     def count_infectious(self):
-        return sum(p.infectious for p in self.people)
+        return self.n_infectious
 
     def count_infected(self):
-        return len(self.infected())
+        return self.n_infected
+
+    def count_isolating(self):
+        return self.n_isolating
+
+    @property
+    def potential_hazard(self):
+        """
+        :return: the total covid_hazard of everyone, worked out once their ages are known
+        """
+        if self._potential_hazard is None:
+            self._potential_hazard = sum(hazard_of(p) for p in self.people)
+        return self._potential_hazard
+
+    def hazard_infected(self):
+        """
+        :return: the covid_hazard of everyone infected so far, as a fraction of the hazard of everyone,
+        or nan if our people do not have ages
+        """
+        if not self.potential_hazard:
+            return np.nan
+        return self.infected_hazard / self.potential_hazard
 
     def infected(self):
         return [p for p in self.people if (p.disease is not None or p.immune)]
 
     def update_time(self):
-        for p in self.people:
-            p.update_time()
+        if self.active is None:
+            for p in self.people:
+                p.update_time()
+        else:
+            for p in self.draw_worriers():
+                p.worry()
+            for i in sorted(self.active):
+                p = self.people[i]
+                p.update_state()
+                if p.quiescent:
+                    self.active.discard(i)
+
+        if self.calendar is not None:
+            for i, periods, days in self.calendar.advance():
+                self.progress_disease(self.people[i], periods, days)
+
+    def progress_disease(self, person, periods, days):
+        """
+        :param periods: the periods since person was infected, on one of their disease milestones
+        :param days: the same, in days
+        """
+        person.time_since_infection = periods
+        person.update_disease(days)
+
+    def on_infection(self, person):
+        self.n_infected += 1
+        self.infected_hazard += hazard_of(person)
+        self.activate(person)
+
+    def on_infectious(self, person, infectious):
+        self.n_infectious += 1 if infectious else -1
+
+    def on_isolation(self, person, isolating):
+        self.n_isolating += 1 if isolating else -1
+        if isolating:
+            self.activate(person)
+
+    def activate(self, person):
+        """
+        :param person: someone who has just been infected or started to isolate
+        """
+        if self.active is not None:
+            self.active.add(person.idx)
+        if self.calendar is not None and person.disease is not None and person.infected_period is None:
+            self.calendar.schedule(person)
+
+    def draw_worriers(self):
+        """
+        :return: the people who worry unnecessarily in this period, drawn as a binomial count then a sample.
+        Nothing is drawn if no one can worry, so that following only the active people then draws the same random
+        numbers as updating everyone
+        """
+        n_people = len(self.people)
+        if n_people == 0 or self.society.prob_worry == 0 or type(self.people[0]).worry is Person.worry:
+            return []
+        n_worried = self.rng.binomial(n_people, self.society.prob_worry)
+        worried = np.unique(self.rng.integers(n_people, size=n_worried))
+        while len(worried) < n_worried:
+            more = self.rng.integers(n_people, size=n_worried - len(worried))
+            worried = np.unique(np.concatenate([worried, more]))
+        return [self.people[i] for i in worried.tolist()]
 
     def victim_dict(self):
         """
@@ -61,6 +253,9 @@ class Population:
         """
         :return: We look at early infectees only.
         """
+        if self.arrays is not None:
+            early = (self.arrays.infector >= 0) & (self.arrays.chain_lengths(max_chain_len) <= max_chain_len)
+            return np.mean(self.arrays.n_victims[early])
         n_victims = [len(person.victims) for person in self.people if
                      person.infector is not None and
                      len(person.chain()) <= max_chain_len]
@@ -68,25 +263,106 @@ class Population:
 
 
 class FixedNetworkPopulation(Population):
-    def __init__(self, n_people, society, person_type=None):
-        Population.__init__(self, n_people, society, person_type=person_type)
-        self.fixed_cliques = self.fix_cliques(society.encounter_size)
+
+    TRANSMISSION = PAIRWISE
+    NETWORK_CACHE = None
+    NETWORK_VERSION = 1    # of how fix_cliques builds the network: changing it stops cached networks being loaded
+
+    def __init__(self, n_people, society, person_type=None, transmission=None, track_active=None,
+                 event_driven=None, rng=None, network_cache=None):
+        """
+        :param transmission: how to draw infections in each period, one of PAIRWISE, VECTORIZED or PRESSURE
+        in codit.population.transmission. If None, this is given by the class attribute TRANSMISSION
+        :param network_cache: a NetworkCache, or the directory of one, from which to load our network if it has
+        been built before from the same seed, and in which to save it otherwise. If None, this is given by the
+        class attribute NETWORK_CACHE, and if that is None too, the network is always built
+        """
+        Population.__init__(self, n_people, society, person_type=person_type, track_active=track_active,
+                            event_driven=event_driven, rng=rng)
+        self.transmission = transmission or self.TRANSMISSION
+        self.clique_kinds = None
+        self._fixed_cliques = None
+        cache = as_cache(network_cache or self.NETWORK_CACHE)
+        key = cache and cache.key(self, society)
+        cached = key and cache.load(key)
+        if cached:
+            self.contacts = self.find_contacts(restore_network(self, cached))
+            return
+
+        cliques = self.fix_cliques(society.encounter_size)
+        if isinstance(cliques, CSR):
+            # the builder has made the cliques as arrays over person.idx already
+            self.cliques = cliques
+        else:
+            self.cliques = CSR.from_rows(sorted(p.idx for p in clique) for clique in cliques)
+        self.memberships = self.cliques.transpose(len(self.people))
         self.contacts = self.find_contacts()
+        if key:
+            cache.save(key, network_arrays(self))
+
+    @property
+    def fixed_cliques(self):
+        """
+        :return: the cliques as lists of people, in the order of self.cliques, from which they are only made when
+        first needed, so that populations sharing one network need not each hold them. They are not sets, which
+        people hash into by where they are in memory, so that the pairwise loop takes them in the same order, and
+        draws the same random numbers, in every process
+        """
+        if self._fixed_cliques is None:
+            self._fixed_cliques = [list(map(self.people.__getitem__, self.cliques.row(i).tolist()))
+                                   for i in range(len(self.cliques))]
+        return self._fixed_cliques
+
+    @fixed_cliques.setter
+    def fixed_cliques(self, cliques):
+        self._fixed_cliques = cliques
+
+    def shared_with_copies(self):
+        return {id(x): x for x in (self.cliques, self.memberships, self.contacts.csr, self.contacts.valencies,
+                                   self.clique_kinds) if x is not None}
 
-    def find_contacts(self):
-        d = defaultdict(set)
-        for gr_set in self.fixed_cliques:
-            for p1 in gr_set:
-                d[p1] |= gr_set
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # a copy makes its own sets of people from self.cliques if it needs them
+        state['_fixed_cliques'] = None
+        return state
+
+    def find_contacts(self, contacts=None):
+        """
+        :param contacts: the CSR from each person to their contacts, if already known
+        :return: a ContactNetwork, also given to each person, so that person.contacts and person.valency work
+        """
+        if contacts is None:
+            contacts = contact_matrix(self.cliques, len(self.people))
+        contacts = ContactNetwork(contacts, self.people)
         for p in self.people:
-            p.contacts = tuple(d[p] - {p})
-        return {p: p.contacts for p in self.people}
+            p.network = contacts
+        return contacts
 
     def fix_cliques(self, mean_num_contacts, group_size=2):
+        """
+        :return: the cliques of the network, as a list of sets of people, or as a CSR over person.idx
+        """
         n_groups = int((len(self.people) + 1) * mean_num_contacts / group_size)
-        ii_jj = [random.choices(self.people, k=n_groups) for _ in range(group_size)]
+        ii_jj = [self.rng.choices(self.people, k=n_groups) for _ in range(group_size)]
         return [set(g) for g in zip(*ii_jj) if len(set(g)) == group_size]
 
+    def attack_in_groupings(self, group_size):
+        if self.transmission == PAIRWISE:
+            return Population.attack_in_groupings(self, group_size)
+
+        infectious, susceptible, isolating = self.state_masks()
+        p_attack = self.attack_probabilities(infectious & ~isolating)
+        if self.transmission == VECTORIZED:
+            victims, infectors = pairwise_infections(self.cliques, infectious, susceptible, isolating, p_attack,
+                                                     self.rng)
+        elif self.transmission == PRESSURE:
+            victims, infectors = pressure_infections(self.cliques, infectious, susceptible, isolating, p_attack,
+                                                     self.rng)
+        else:
+            raise ValueError(f"unrecognised transmission: {self.transmission}")
+        self.infect(victims, infectors)
+
     def form_groupings(self, group_size):
         """
         :param group_size: Does nothing in this method
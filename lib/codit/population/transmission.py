@@ -0,0 +1,80 @@
+"""
+Batched alternatives to the loop in Population.attack_in_groupings, which draw all of a step's infections
+over a population's fixed cliques at once. They draw from who is infectious as the step begins, so that someone
+infected in a step first attacks in the next, whereas the loop lets a person who is infectious as soon as they are
+infected, like the toy Person, attack the cliques it comes to later in the same step.
+"""
+import numpy as np
+
+from codit.population.network import expand_pairs
+
+PAIRWISE = 'pairwise'      # the original loop over cliques, infectious people and their fellow members
+VECTORIZED = 'vectorized'  # the same trials, drawn with numpy in one pass
+PRESSURE = 'pressure'      # one trial per susceptible member, against the infection pressure of the whole clique
+
+
+def pairwise_infections(cliques, infectious, susceptible, isolating, p_attack, rng):
+    """
+    :param cliques: a CSR from each clique to its members
+    :param infectious: boolean array over person.idx
+    :param susceptible: boolean array over person.idx
+    :param isolating: boolean array over person.idx, these people neither attack nor are attacked
+    :param p_attack: array over person.idx, the chance that each infectious person infects each fellow member
+    :param rng: a RandomStream or numpy Generator
+    :return: arrays (victims, infectors). Every infectious-susceptible pair in a clique has one Bernoulli trial,
+    and each victim is attributed to the first successful attack in the order that the loop would try them.
+    """
+    members = cliques.indices
+    clique_of = cliques.row_ids()
+    present = ~isolating[members]
+
+    infectious_at = np.flatnonzero(present & infectious[members])
+    susceptible_at = np.flatnonzero(present & susceptible[members])
+
+    n_susceptible = np.bincount(clique_of[susceptible_at], minlength=len(cliques))
+    first_susceptible = np.cumsum(n_susceptible) - n_susceptible
+    infectious_clique = clique_of[infectious_at]
+
+    infectors, victims = expand_pairs(members[infectious_at],
+                                      first_susceptible[infectious_clique],
+                                      n_susceptible[infectious_clique],
+                                      members[susceptible_at])
+    hit = rng.random(len(victims)) < p_attack[infectors]
+    return first_attacks(victims[hit], infectors[hit])
+
+
+def pressure_infections(cliques, infectious, susceptible, isolating, p_attack, rng):
+    """
+    Each clique counts its I infectious non-isolating members, and each of its susceptible non-isolating members is
+    infected with probability 1 - (1 - p)^I, by one of those I chosen uniformly. This has the same distribution as
+    pairwise_infections (when the infectious share one disease) but costs O(k) rather than O(k^2) for a clique of k.
+    :return: arrays (victims, infectors), taking the parameters of pairwise_infections
+    """
+    members = cliques.indices
+    clique_of = cliques.row_ids()
+    present = ~isolating[members]
+
+    infectious_at = np.flatnonzero(present & infectious[members])
+    infectious_clique = clique_of[infectious_at]
+    n_infectious = np.bincount(infectious_clique, minlength=len(cliques))
+    with np.errstate(divide='ignore'):
+        log_escape = np.bincount(infectious_clique, weights=np.log1p(-p_attack[members[infectious_at]]),
+                                 minlength=len(cliques))
+
+    susceptible_at = np.flatnonzero(present & susceptible[members] & (n_infectious[clique_of] > 0))
+    susceptible_clique = clique_of[susceptible_at]
+    hit = rng.random(len(susceptible_at)) < -np.expm1(log_escape[susceptible_clique])
+
+    victims_at, victims_clique = susceptible_at[hit], susceptible_clique[hit]
+    first_infectious = np.cumsum(n_infectious) - n_infectious
+    chosen = first_infectious[victims_clique] + (rng.random(len(victims_at)) * n_infectious[victims_clique]).astype(int)
+    return first_attacks(members[victims_at], members[infectious_at[chosen]])
+
+
+def first_attacks(victims, infectors):
+    """
+    :return: (victims, infectors), keeping only the first attack on each victim
+    """
+    _, first = np.unique(victims, return_index=True)
+    first.sort()
+    return victims[first], infectors[first]
@@ -0,0 +1,101 @@
+import math
+
+import numpy as np
+
+BLOCK_SIZE = 4096
+
+
+def seed_sequence(seed=None):
+    """
+    :param seed: None (for fresh entropy), an int, or a SeedSequence
+    :return: a SeedSequence, which is a fresh copy of seed if that is one, so that what it spawns does not depend
+    on what has already been spawned from seed
+    """
+    if isinstance(seed, np.random.SeedSequence):
+        return np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key, pool_size=seed.pool_size)
+    return np.random.SeedSequence(seed)
+
+
+class RandomStream:
+    """
+    One stream of random numbers for a simulation, held as a numpy Generator.
+    Everything stochastic draws from a stream that it is given, rather than from the global state of random or
+    np.random, so that a simulation is reproducible from its seed and parallel simulations do not interfere.
+    As well as the methods of the Generator, it has the scalar methods of the random module used by the model,
+    and these draw their uniforms in blocks, because millions of scalar calls to the Generator are slow.
+    """
+    def __init__(self, seed=None):
+        """
+        :param seed: None, an int, a SeedSequence, or a numpy Generator
+        """
+        if isinstance(seed, np.random.Generator):
+            self.seed_sequence = None
+            self.generator = seed
+        else:
+            self.seed_sequence = seed_sequence(seed)
+            self.generator = np.random.default_rng(self.seed_sequence)
+        self._block = []
+        self._next = 0
+
+    def __getattr__(self, name):
+        if name.startswith('__') or name in ('generator', 'seed_sequence', '_block', '_next'):
+            raise AttributeError(name)
+        return getattr(self.generator, name)
+
+    def random(self, size=None):
+        if size is not None:
+            return self.generator.random(size)
+        if self._next == len(self._block):
+            self._block = self.generator.random(BLOCK_SIZE).tolist()
+            self._next = 0
+        self._next += 1
+        return self._block[self._next - 1]
+
+    def randint(self, a, b):
+        """
+        :return: a random integer in [a, b], including b
+        """
+        return a + int(self.random() * (b - a + 1))
+
+    def choice(self, seq):
+        return seq[int(self.random() * len(seq))]
+
+    def choices(self, population, k):
+        """
+        :return: k draws from population, with replacement
+        """
+        return [population[i] for i in self.generator.integers(len(population), size=k).tolist()]
+
+    def sample(self, population, k):
+        """
+        :return: k draws from population, without replacement
+        """
+        n = len(population)
+        if 3 * k > n:
+            chosen = self.generator.permutation(n)[:k].tolist()
+        else:
+            chosen, seen = [], set()
+            while len(chosen) < k:
+                i = int(self.random() * n)
+                if i not in seen:
+                    seen.add(i)
+                    chosen.append(i)
+        return [population[i] for i in chosen]
+
+    def shuffle(self, x):
+        """
+        Shuffle the list x in place
+        """
+        x[:] = [x[i] for i in self.generator.permutation(len(x)).tolist()]
+
+    def exponential(self, scale=1.0, size=None):
+        if size is not None:
+            return self.generator.exponential(scale, size)
+        return -scale * math.log1p(-self.random())
+
+
+def as_stream(rng):
+    """
+    :return: rng if it is a RandomStream, otherwise a RandomStream seeded by it (with fresh entropy if None)
+    """
+    return rng if isinstance(rng, RandomStream) else RandomStream(rng)
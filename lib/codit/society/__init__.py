@@ -1,4 +1,4 @@
-import random
+import numpy as np
 
 from codit.society.basic import Society
 
@@ -12,7 +12,7 @@ class TestingSociety(Society):
             self.add_test(person, notes)
 
     def overlook_test(self):
-        return (self.cfg.PROB_TEST_IF_REQUESTED < 1) and (random.random() >= self.cfg.PROB_TEST_IF_REQUESTED)
+        return (self.cfg.PROB_TEST_IF_REQUESTED < 1) and (self.rng.random() >= self.cfg.PROB_TEST_IF_REQUESTED)
 
     def add_test(self, person, notes, front_of_queue=False):
         q, = self.queues
@@ -23,7 +23,7 @@ class TestingSociety(Society):
 
     def remove_test(self, test, queue):
         queue.remove_test(test)
-        self.test_recorder.append(test.__dict__)
+        self.test_recorder.append(test)
 
     def remove_stale_test(self, person):
         for q in self.queues:
@@ -34,18 +34,23 @@ class TestingSociety(Society):
 
     def currently_testing(self, person):
         for q in self.queues:
-            if len(list(q.tests_of(person))) > 0:
+            if q.has_swabbed_test(person):
                 return True
         return False
 
     def manage_outbreak(self, population, max_processed=None):
-        for q in self.queues:
-            q.update_tests(1. / self.episodes_per_day)
-        self.set_actionable_tests(max_processed)
-        self.act_on_tests()
+        with self.timer.phase('update tests'):
+            for q in self.queues:
+                self.timer.count('tests added', q.n_arrivals)
+                q.update_tests(1. / self.episodes_per_day)
+        with self.timer.phase('pick tests'):
+            self.set_actionable_tests(max_processed)
+        with self.timer.phase('act on tests'):
+            self.act_on_tests()
 
     def act_on_tests(self):
         for q in self.queues:
+            self.timer.count('tests processed', len(q.completed_tests))
             for r_test in q.completed_tests:
                 self.remove_test(r_test, q)
                 r_test.person.get_test_results(r_test.positive)
@@ -64,11 +69,14 @@ class TestingTracingSociety(TestingSociety):
 
     def act_on_test(self, test, test_contacts=False):
         if test.positive:
+            n_traced = 0
             for c in test.person.contacts:
-                if random.random() < self.cfg.PROB_TRACING_GIVEN_CONTACT:
+                if self.rng.random() < self.cfg.PROB_TRACING_GIVEN_CONTACT:
+                    n_traced += 1
                     self.screen_contact_for_testing(c, do_test=test_contacts)
-                    if random.random() < self.cfg.PROB_ISOLATE_IF_TRACED:
+                    if self.rng.random() < self.cfg.PROB_ISOLATE_IF_TRACED:
                         c.isolate()
+            self.timer.count('contacts traced', n_traced)
 
     def screen_contact_for_testing(self, c, do_test=True):
         if do_test:
@@ -97,7 +105,7 @@ class ContactDoubleTestingSociety(UKSociety):
         ContactTestingSociety.act_on_test(self, test)
 
         if not test.positive and test.notes == 'contact':
-            if random.random() < self.cfg.PROB_ISOLATE_IF_TRACED:
+            if self.rng.random() < self.cfg.PROB_ISOLATE_IF_TRACED:
                 test.person.isolate()
                 if not self.currently_testing(test.person):
                     q, = self.queues
@@ -110,19 +118,19 @@ class HighValencyTester(ContactDoubleTestingSociety):
     VALENCY_TEST_FREQUENCY_DAYS = 7
 
     def manage_outbreak(self, population, max_processed=None):
-        self.handle_high_valencies(population)
+        with self.timer.phase('high valencies'):
+            self.handle_high_valencies(population)
         ContactDoubleTestingSociety.manage_outbreak(self, population)
 
     def handle_high_valencies(self, population):
-        for person in population.people:
-            if len(person.contacts) >= self.GENERAL_VALENCY_THRESHOLD:
-                self.handle_connected_person(person)
+        for i in np.flatnonzero(population.contacts.valencies >= self.GENERAL_VALENCY_THRESHOLD):
+            self.handle_connected_person(population.people[i])
 
     def handle_connected_person(self, person):
         if not self.currently_testing(person):
             q = self.queues[0]
             # add the test to the first queue (of 1!) (later we will make this the high-priority queue)
-            if not (q.contains_planned_test_of(person)):
+            if not q.has_planned_test(person):
                 q.add_test(person, 'valency', self.cfg.TEST_DAYS_ELAPSED,
                            days_delayed_start=self.VALENCY_TEST_FREQUENCY_DAYS)
 
@@ -10,14 +10,14 @@ class StrategicTester(UKSociety):
         UKSociety.act_on_test(self, test, test_contacts=True)
 
     def get_test_request(self, person, notes=''):
-        if len(person.contacts) < self.MIN_CONTACTS:
+        if person.valency < self.MIN_CONTACTS:
             return
 
         if self.currently_testing(person):
             return
 
         if notes == 'symptoms':
-            if len(person.contacts) >= self.MIN_CONTACTS_SYMPTOMS:
+            if person.valency >= self.MIN_CONTACTS_SYMPTOMS:
                 self.add_test(person, notes)
 
         elif notes == 'contact':
@@ -1,8 +1,16 @@
 from codit.config import set_config
+from codit.rng import RandomStream
 from codit.society.test import TestQueue
+from codit.society.test_log import TestLog
+from codit.timing import NO_TIMER
 
 class Society:
-    def __init__(self, episodes_per_day=None, encounter_size=None, prob_unnecessary_worry=0, config=None):
+
+    TEST_DIAGNOSTICS = False   # whether tests record how many susceptible contacts (of contacts) the person has
+    TEST_LOG = None            # a directory to which the log of processed tests is written as it goes, or None
+
+    def __init__(self, episodes_per_day=None, encounter_size=None, prob_unnecessary_worry=0, config=None,
+                 test_log=None):
         set_config(self, config)
         if not prob_unnecessary_worry:
             prob_unnecessary_worry = self.cfg.PROB_NON_C19_SYMPTOMS_PER_DAY
@@ -10,7 +18,9 @@ class Society:
         self.encounter_size = encounter_size or self.cfg.MEAN_NETWORK_SIZE
         self.prob_worry = prob_unnecessary_worry / self.episodes_per_day
         self.queues = [TestQueue()]
-        self.test_recorder = []
+        self.test_recorder = TestLog(test_log or self.TEST_LOG)
+        self.rng = RandomStream()   # an Outbreak gives its society the stream of the simulation
+        self.timer = NO_TIMER       # and its timer, if it is timed
 
     def manage_outbreak(self, population):
         pass
@@ -1,8 +1,7 @@
 from codit.society import UKSociety, HighValencyTester
 from codit.society.test import TestQueue
-import random
 import logging
-from numpy.random import exponential as exp_dis
+import numpy as np
 
 
 def coopt_existing_test(track, notes, person):
@@ -31,10 +30,13 @@ class LateralFlowUK(UKSociety):
 
     def act_on_test(self, test, n_reps_lateral_test=5):
         if test.positive:
+            n_traced = 0
             for c in test.person.contacts:
-                if random.random() < self.cfg.PROB_TRACING_GIVEN_CONTACT:
-                    if random.random() < self.cfg.PROB_GET_TEST_IF_TRACED:
+                if self.rng.random() < self.cfg.PROB_TRACING_GIVEN_CONTACT:
+                    n_traced += 1
+                    if self.rng.random() < self.cfg.PROB_GET_TEST_IF_TRACED:
                         self.get_test_request(c, notes=('contact', 1), lateral_flow=True)
+            self.timer.count('contacts traced', n_traced)
             return
 
         if 'contact' in test.notes:
@@ -62,7 +64,7 @@ class LateralFlowUK(UKSociety):
         processing_days = 0.02   # about half an hour
         if not lateral_flow:
             track = self.slow_track
-            processing_days = exp_dis(self.cfg.TEST_DAYS_ELAPSED)
+            processing_days = self.rng.exponential(self.cfg.TEST_DAYS_ELAPSED)
 
         if coopt_existing_test(track, notes, person):
             return
@@ -71,7 +73,7 @@ class LateralFlowUK(UKSociety):
 
         if lateral_flow and (days_delayed_start == 0):
             # isolate for the (normally) short period while they get the first test result
-            if random.random() < self.cfg.PROB_ISOLATE_IF_TRACED:
+            if self.rng.random() < self.cfg.PROB_ISOLATE_IF_TRACED:
                 person.isolate()
 
     def add_test(self, person, notes, front_of_queue=False):
@@ -89,27 +91,25 @@ class LateralFlowUK(UKSociety):
         if self.valency_threshold is None:
             self.set_valency_threshold(population)
 
-        for person in population.people:
+        with self.timer.phase('expire lateral tests'):
+            self.fast_track.remove_planned_tests_older_than(max_days_wait_for_lateral)
 
-            for test in self.fast_track.contains_planned_test_of(person):
-                if test.days_elapsed > max_days_wait_for_lateral:
-                    self.fast_track.remove_test(test)
-
-            if len(person.contacts) > self.valency_threshold:
-                self.handle_connected_person(person)
+        with self.timer.phase('high valencies'):
+            for i in np.flatnonzero(population.contacts.valencies > self.valency_threshold):
+                self.handle_connected_person(population.people[i])
 
         UKSociety.manage_outbreak(self, population)
 
     def set_valency_threshold(self, population):
-        degrees = sorted(population.contacts.values(), key=len)
+        degrees = np.sort(population.contacts.valencies)
         idx = int(self.GENERAL_VALENCY_QUANTILE_THRESHOLD * len(population.people))
-        self.valency_threshold = len(degrees[idx - 1])
-        logging.info(f"Setting mass testing valency/degree limit to {len(degrees[idx - 1])}")
+        self.valency_threshold = int(degrees[idx - 1])
+        logging.info(f"Setting mass testing valency/degree limit to {self.valency_threshold}")
 
     def handle_connected_person(self, person):
         if not self.currently_testing(person):
-            if not self.fast_track.contains_planned_test_of(person):
+            if not self.fast_track.has_planned_test(person):
                 self.get_test_request(person,
                                       notes='valency',
                                       lateral_flow=True,
-                                      days_delayed_start=exp_dis(self.VALENCY_TEST_FREQUENCY_DAYS))
+                                      days_delayed_start=self.rng.exponential(self.VALENCY_TEST_FREQUENCY_DAYS))
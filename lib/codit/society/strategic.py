@@ -1,6 +1,5 @@
 from codit.society import UKSociety, HighValencyTester
 from codit.society.test import TestQueue
-import random
 
 
 class TwoTrackTester(UKSociety):
@@ -20,21 +19,21 @@ class TwoTrackTester(UKSociety):
         UKSociety.act_on_test(self, test, test_contacts=True)
 
         if not test.positive and test.notes == 'contact':
-            if random.random() < self.cfg.PROB_ISOLATE_IF_TRACED:
+            if self.rng.random() < self.cfg.PROB_ISOLATE_IF_TRACED:
                 test.person.isolate()
                 self.get_test_request(test.person, notes='contact part two',
                                       priority=True, days_delayed_start=self.DAYS_TO_CONTACTS_SECOND_TEST)
 
     def screen_contact_for_testing(self, c, do_test=None):
-        if len(c.contacts) >= self.CONTACT_VALENCY_THRESHOLD:
+        if c.valency >= self.CONTACT_VALENCY_THRESHOLD:
             self.get_test_request(c, notes='contact', priority=True)
 
     def get_test_request(self, person, notes='', priority=False, days_delayed_start=0):
 
-        if len(person.contacts) < self.MIN_CONTACTS_TEST:
+        if person.valency < self.MIN_CONTACTS_TEST:
             return
 
-        if random.random() < self.cfg.PROB_TEST_IF_REQUESTED:
+        if self.rng.random() < self.cfg.PROB_TEST_IF_REQUESTED:
             if not self.currently_testing(person):
                 args = (person, notes, self.cfg.TEST_DAYS_ELAPSED, False, days_delayed_start)
                 if priority:
@@ -57,7 +56,7 @@ class TwoTrackTesterofSymptoms(TwoTrackTester):
 
     def get_test_request(self, person, notes='', priority=False, days_delayed_start=0):
 
-        if notes == 'symptoms' and len(person.contacts) > self.CONTACT_VALENCY_THRESHOLD:
+        if notes == 'symptoms' and person.valency > self.CONTACT_VALENCY_THRESHOLD:
             assert not priority
             priority = True
 
@@ -73,11 +72,12 @@ class TwoTrackSystem(TwoTrackTesterofSymptoms):
     GENERAL_VALENCY_THRESHOLD = 20
 
     def manage_outbreak(self, population, max_processed=None):
-        HighValencyTester.handle_high_valencies(self, population)
+        with self.timer.phase('high valencies'):
+            HighValencyTester.handle_high_valencies(self, population)
         UKSociety.manage_outbreak(self, population)
 
     def handle_connected_person(self, person):
         if not self.currently_testing(person):
-            if not self.fast_track.contains_planned_test_of(person):
+            if not self.fast_track.has_planned_test(person):
                 self.fast_track.add_test(person, 'valency', self.cfg.TEST_DAYS_ELAPSED,
                                          days_delayed_start=self.VALENCY_TEST_FREQUENCY_DAYS)
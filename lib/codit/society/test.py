@@ -1,51 +1,178 @@
+import bisect
+import heapq
 import logging
 from collections import defaultdict
 
+
 class Test:
+    __slots__ = ('person', 'positive', 'days_to_complete', 'notes', 'days_delayed_start', '_succeptible_contacts',
+                 '_succeptible_contacts_of_contacts', '_days_infected', '_isolating', 'swab_taken',
+                 'queue', 'position', 'added_tick', 'swab_tick', 'complete_tick', '_days_elapsed')
+
     def __init__(self, person, notes, time_to_complete, days_delayed_start=0):
-        self.days_elapsed = 0
         self.person = person
         self.positive = None
         self.days_to_complete = time_to_complete + days_delayed_start
         self.notes = notes
         self.days_delayed_start = days_delayed_start
-        targets = [q for q in person.contacts if not q.infected]
-        self._succeptible_contacts = len(targets)
-        self._succeptible_contacts_of_contacts = len([s for v in targets for s in v.contacts if not s.infected])
+        self._succeptible_contacts = None
+        self._succeptible_contacts_of_contacts = None
+        if person.society.TEST_DIAGNOSTICS:
+            # for many tests at once, ContactNetwork.susceptible_contact_counts is far quicker
+            targets = [q for q in person.contacts if not q.infected]
+            self._succeptible_contacts = len(targets)
+            self._succeptible_contacts_of_contacts = len([s for v in targets for s in v.contacts if not s.infected])
         self._days_infected = person.days_infected() if person.infected else None
         self._isolating = person.isolating
         self.swab_taken = False
 
-    def update_time(self, timedelta):
-        if self.time_to_swab(timedelta):
-            assert not self.swab_taken
-            self.swab()
-        self.days_elapsed += timedelta
+        # set by the TestQueue holding this test
+        self.queue = None
+        self.position = None
+        self.added_tick = None
+        self.swab_tick = None
+        self.complete_tick = None
+        self._days_elapsed = 0
+
+    @property
+    def days_elapsed(self):
+        if self.queue is None:
+            return self._days_elapsed
+        return self.queue.clock.days(self.queue.clock.ticks - self.added_tick)
 
     def swab(self):
         self.positive = self.person.infectious
         self.swab_taken = True
 
-    def time_to_swab(self, timedelta):
-        return self.days_delayed_start + timedelta > self.days_elapsed >= self.days_delayed_start
+    def record(self):
+        """
+        :return: a dictionary of what there is to know about this test
+        """
+        record = {k: getattr(self, k) for k in self.__slots__ if k not in ('queue', '_days_elapsed')}
+        record['days_elapsed'] = self.days_elapsed
+        return record
+
+
+class Clock:
+    """
+    Counts the periods for which a TestQueue has been updated. The days elapsed after k periods are the sum of k
+    timedeltas, added up one at a time, just as if each test were adding them to its own days_elapsed
+    """
+    def __init__(self):
+        self.ticks = 0
+        self.time_delta = None
+        self._days = [0.]
+
+    def tick(self, time_delta):
+        assert self.time_delta in (None, time_delta), "a TestQueue must be updated by the same timedelta every period"
+        self.time_delta = time_delta
+        self.ticks += 1
+
+    def days(self, ticks):
+        """
+        :return: the days elapsed after ticks periods
+        """
+        while len(self._days) <= ticks:
+            self._days.append(self._days[-1] + self.time_delta)
+        return self._days[ticks]
+
+    def ticks_until(self, days):
+        """
+        :return: the fewest periods after which at least the given days have elapsed
+        """
+        while self._days[-1] < days:
+            self._days.append(self._days[-1] + self.time_delta)
+        return bisect.bisect_left(self._days, days)
+
+
+class Fenwick:
+    """
+    A binary indexed tree of counts, growing as needed, so that we can count the swabbed tests ahead of any test
+    """
+    def __init__(self, size=16):
+        self.tree = [0] * (size + 1)
+
+    def add(self, i, delta):
+        if i + 1 >= len(self.tree):
+            self._grow(i + 1)
+        i += 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i):
+        """
+        :return: the sum of the counts before i
+        """
+        i = min(i, len(self.tree) - 1)
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def _grow(self, size):
+        counts = [self.prefix(i + 1) - self.prefix(i) for i in range(len(self.tree) - 1)]
+        self.tree = [0] * (2 * size + 1)
+        for i, c in enumerate(counts):
+            if c:
+                self.add(i, c)
 
 
 class TestQueue:
+    """
+    Tests wait in line, with those put at the front of the queue ahead of all the others, and those added otherwise
+    behind all the others. Each test is given its absolute swab and completion periods when the queue first gets
+    to it, so rather than ticking every test in each period, the queue swabs and releases the tests that fall due.
+    """
     def __init__(self):
-        self._taken_and_planned = []
         self.completed_tests = []
         self._tests_of = defaultdict(list)
+        self._n_swabbed_of = defaultdict(int)
+        self._n_planned_of = defaultdict(int)
+        self.n_swabbed = 0
+        self.clock = Clock()
+
+        self._queue = {}          # from test.position to test, for every test still in the queue
+        self._arrivals = []       # tests added since the last update, not yet given their swab and completion
+        self._swabs = []          # heap of (test.swab_tick, test.position, test)
+        self._completions = []    # heap of (test.complete_tick, test.position, test)
+        self._ready = []          # heap of (test.position, test) for swabbed tests that have completed
+        self._planned = []        # heap of (test.added_tick, test.position, test) for tests that may be unswabbed
+        self._n_back = 0          # the positions handed out so far behind, and at the front of, the queue
+        self._n_front = 0
+        self._swabbed_back = Fenwick()
+        self._swabbed_front = Fenwick()
+        self._n_swabbed_front = 0
 
     @property
     def tests(self):
         """
         :return: for past reasons, this attribute only returns tests whose swabs have been taken
         """
-        return (t for t in self._taken_and_planned if t.swab_taken)
+        return (t for t in self._in_order() if t.swab_taken)
+
+    @property
+    def n_arrivals(self):
+        """
+        :return: the number of tests added since the last update
+        """
+        return len(self._arrivals)
+
+    def _in_order(self):
+        return (self._queue[p] for p in sorted(self._queue))
 
     def remove_test(self, test):
-        self._taken_and_planned.remove(test)
+        del self._queue[test.position]
         self._tests_of[test.person].remove(test)
+        if test.swab_taken:
+            self.n_swabbed -= 1
+            self._n_swabbed_of[test.person] -= 1
+            self._count_swab(test, -1)
+        else:
+            self._n_planned_of[test.person] -= 1
+        test._days_elapsed = test.days_elapsed
+        test.queue = None
 
     def add_test(self, person, notes, time_to_complete, front_of_queue=False, days_delayed_start=0):
 
@@ -55,33 +182,151 @@ class TestQueue:
             return
 
         test = Test(person, notes, time_to_complete, days_delayed_start=days_delayed_start)
+        # the queue runs in order of position: tests put at the front have ever smaller (negative) positions
+        if self._n_back + self._n_front > 2 * len(self._queue) + 64:
+            self._compact()
         if front_of_queue:
-            self._taken_and_planned.insert(0, test)
+            test.position = -1 - self._n_front
+            self._n_front += 1
         else:
-            self._taken_and_planned.append(test)
+            test.position = self._n_back
+            self._n_back += 1
+        test.queue = self
+        test.added_tick = self.clock.ticks
+        self._queue[test.position] = test
+        self._arrivals.append(test)
+        if len(self._planned) > 2 * len(self._queue) + 16:
+            self._planned = [e for e in self._planned if e[2].queue is self and not e[2].swab_taken]
+            heapq.heapify(self._planned)
+        heapq.heappush(self._planned, (test.added_tick, test.position, test))
         self._tests_of[person].append(test)
+        self._n_planned_of[person] += 1
+
+    def planned_tests(self):
+        """
+        :return: the tests whose swabs have not yet been taken
+        """
+        return [t for t in self._in_order() if not t.swab_taken]
+
+    def remove_planned_tests_older_than(self, days):
+        """
+        Remove the tests whose swabs have not been taken after more than the given days in the queue
+        """
+        while self._planned:
+            added_tick, _, test = self._planned[0]
+            if test.queue is self and not test.swab_taken and test.days_elapsed <= days:
+                break
+            heapq.heappop(self._planned)
+            if test.queue is self and not test.swab_taken:
+                self.remove_test(test)
 
     def tests_of(self, person):
+        if not self.has_swabbed_test(person):
+            return []
         return [t for t in self._tests_of[person] if t.swab_taken]
 
     def contains_planned_test_of(self, person):
+        if not self.has_planned_test(person):
+            return []
         return [t for t in self._tests_of[person] if not t.swab_taken]
 
+    def has_swabbed_test(self, person):
+        return self._n_swabbed_of.get(person, 0) > 0
+
+    def has_planned_test(self, person):
+        return self._n_planned_of.get(person, 0) > 0
+
     def pick_actionable_tests(self, max_processed, logging_overrun=None):
-        actionable_tests = []
-        tests = [t for t in self.tests]
-        for i, t in enumerate(tests):
+        """
+        :return: in queue order, the completed tests among the first max_processed swabbed tests in the queue
+        """
+        while self._completions and self._completions[0][0] <= self.clock.ticks:
+            _, position, test = heapq.heappop(self._completions)
+            if test.queue is self:
+                heapq.heappush(self._ready, (position, test))
 
-            if max_processed is not None and i >= max_processed:
-                if logging_overrun:
-                    logging.info(logging_overrun)
+        actionable_tests = []
+        while self._ready:
+            position, test = self._ready[0]
+            if test.queue is not self:
+                heapq.heappop(self._ready)
                 continue
+            if max_processed is not None and self._swabbed_ahead_of(test) >= max_processed:
+                break
+            actionable_tests.append(heapq.heappop(self._ready)[1])
+        for test in actionable_tests:
+            heapq.heappush(self._ready, (test.position, test))
 
-            if t.days_elapsed >= t.days_to_complete:
-                actionable_tests.append(t)
-
+        if logging_overrun and max_processed is not None and self.n_swabbed > max_processed:
+            logging.info(logging_overrun)
         return actionable_tests
 
     def update_tests(self, time_delta):
-        for t in self._taken_and_planned:
-            t.update_time(time_delta)
+        for test in self._arrivals:
+            self._schedule(test, time_delta)
+        self._arrivals = []
+
+        self.clock.tick(time_delta)
+        while self._swabs and self._swabs[0][0] <= self.clock.ticks:
+            _, position, test = heapq.heappop(self._swabs)
+            if test.queue is self:
+                test.swab()
+                self.n_swabbed += 1
+                self._n_swabbed_of[test.person] += 1
+                self._n_planned_of[test.person] -= 1
+                self._count_swab(test, 1)
+                heapq.heappush(self._completions, (test.complete_tick, position, test))
+
+    def _schedule(self, test, time_delta):
+        """
+        Work out the period at which test is swabbed, which is the one starting with at least days_delayed_start
+        elapsed (and less than a timedelta more), and the period from which it counts as completed
+        """
+        self.clock.time_delta = self.clock.time_delta or time_delta
+        to_swab = self.clock.ticks_until(test.days_delayed_start)
+        if not test.days_delayed_start + time_delta > self.clock.days(to_swab):
+            return
+        test.swab_tick = test.added_tick + to_swab + 1
+        test.complete_tick = max(test.swab_tick, test.added_tick + self.clock.ticks_until(test.days_to_complete))
+        heapq.heappush(self._swabs, (test.swab_tick, test.position, test))
+
+    def _compact(self):
+        """
+        Renumber the tests in the queue 0, 1, 2, ... in order, so that the positions, and the trees counting swabs
+        by position, grow with the tests in the queue rather than with every test ever added to it. The heaps
+        are rebuilt with the new positions, leaving out the tests no longer in the queue
+        """
+        tests = list(self._in_order())
+        for position, test in enumerate(tests):
+            test.position = position
+        self._queue = dict(enumerate(tests))
+        self._n_back, self._n_front = len(tests), 0
+        self._swabbed_back, self._swabbed_front = Fenwick(len(tests) + 16), Fenwick()
+        self._n_swabbed_front = 0
+        for test in tests:
+            if test.swab_taken:
+                self._count_swab(test, 1)
+
+        def renumbered(heap, keep=lambda test: True):
+            heap = [e[:-2] + (e[-1].position, e[-1]) for e in heap if e[-1].queue is self and keep(e[-1])]
+            heapq.heapify(heap)
+            return heap
+        self._swabs = renumbered(self._swabs)
+        self._completions = renumbered(self._completions)
+        self._ready = renumbered(self._ready)
+        self._planned = renumbered(self._planned, lambda test: not test.swab_taken)
+
+    def _count_swab(self, test, delta):
+        if test.position < 0:
+            self._swabbed_front.add(-1 - test.position, delta)
+            self._n_swabbed_front += delta
+        else:
+            self._swabbed_back.add(test.position, delta)
+
+    def _swabbed_ahead_of(self, test):
+        """
+        :return: the number of swabbed tests ahead of test in the queue
+        """
+        if test.position < 0:
+            return self._n_swabbed_front - self._swabbed_front.prefix(-test.position)
+        return self._n_swabbed_front + self._swabbed_back.prefix(test.position)
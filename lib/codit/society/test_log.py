@@ -0,0 +1,180 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# the columns of the log, with their dtype and, for those that may be None, the value that stands for None.
+# Notes like ('contact', 1) are logged as their kind in notes and their depth in contact_depth, and put back
+# together by to_frame. Notes of None are logged as ''
+COLUMNS = (
+    ('person', np.int64, None),
+    ('notes', str, None),
+    ('contact_depth', np.int64, -1),
+    ('positive', np.int8, -1),
+    ('swab_taken', bool, None),
+    ('days_to_complete', np.float64, None),
+    ('days_delayed_start', np.float64, None),
+    ('added_tick', np.int64, -1),
+    ('swab_tick', np.int64, -1),
+    ('complete_tick', np.int64, -1),
+    ('days_elapsed', np.float64, None),
+    ('_days_infected', np.float64, np.nan),
+    ('_isolating', bool, None),
+    ('_succeptible_contacts', np.int64, -1),
+    ('_succeptible_contacts_of_contacts', np.int64, -1),
+)
+
+
+class TestLog:
+    """
+    A log of every test a society has processed, kept as typed columns, so that it holds no people and costs a few
+    dozen bytes a test. Tests are buffered as rows, and every chunk_size of them are turned into arrays, which are
+    written to a file of their own in directory, if there is one, and otherwise kept in memory
+    """
+    def __init__(self, directory=None, chunk_size=4096):
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.chunks = []
+        self.n_chunks = 0
+        self.n_flushed = 0
+        self._rows = []
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def branch(self):
+        """
+        Carry on this log, a copy of another, as a snapshot of an outbreak has, in a new sub-directory of the other's
+        directory, if it has one, starting from links to the chunks written so far, so that the two logs never write
+        over each other's chunks. Chunks are only ever moved into place, never written in place, so the links stay
+        as they were
+        """
+        if self.directory is None:
+            return
+        directory, self.directory = self.directory, branch_directory(self.directory)
+        for k in range(self.n_chunks):
+            link_or_copy(chunk_path(directory, k), chunk_path(self.directory, k))
+
+    def __len__(self):
+        return self.n_flushed + len(self._rows)
+
+    def append(self, test):
+        self._rows.append((
+            test.person.idx,
+            *split_notes(test.notes),
+            -1 if test.positive is None else test.positive,
+            test.swab_taken,
+            test.days_to_complete,
+            test.days_delayed_start,
+            -1 if test.added_tick is None else test.added_tick,
+            -1 if test.swab_tick is None else test.swab_tick,
+            -1 if test.complete_tick is None else test.complete_tick,
+            test.days_elapsed,
+            np.nan if test._days_infected is None else test._days_infected,
+            test._isolating,
+            -1 if test._succeptible_contacts is None else test._succeptible_contacts,
+            -1 if test._succeptible_contacts_of_contacts is None else test._succeptible_contacts_of_contacts,
+        ))
+        if len(self._rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Turn the buffered rows into a chunk of columns, and write it out if the log has a directory
+        """
+        if not self._rows:
+            return
+        chunk = {name: np.array(values, dtype=dtype)
+                 for (name, dtype, _), values in zip(COLUMNS, zip(*self._rows))}
+        if self.directory is None:
+            self.chunks.append(chunk)
+        else:
+            # written alongside, then moved into place, so that whoever reads the directory never sees half a chunk
+            path = chunk_path(self.directory, self.n_chunks)
+            with open(f"{path}.tmp", 'wb') as f:
+                np.savez(f, **chunk)
+            os.replace(f"{path}.tmp", path)
+        self.n_chunks += 1
+        self.n_flushed += len(self._rows)
+        self._rows = []
+
+    def to_frame(self):
+        """
+        :return: a DataFrame of every test in the log, with a row for each test
+        """
+        self.flush()
+        if self.directory is None:
+            return to_frame(self.chunks)
+        return load_test_log(self.directory)
+
+
+def chunk_path(directory, k):
+    return os.path.join(directory, f"tests-{k:06d}.npz")
+
+
+def branch_directory(directory):
+    """
+    :return: a new sub-directory of directory, for the log of a branch, named branch-000, branch-001, ...
+    """
+    k = 0
+    while True:
+        path = os.path.join(directory, f"branch-{k:03d}")
+        try:
+            os.makedirs(path)
+            return path
+        except FileExistsError:
+            k += 1
+
+
+def link_or_copy(source, destination):
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+def load_test_log(directory):
+    """
+    :return: a DataFrame of the tests written to directory by a TestLog, which may still be running
+    """
+    chunks = []
+    for name in sorted(os.listdir(directory)):
+        if name.startswith('tests-') and name.endswith('.npz'):
+            with np.load(os.path.join(directory, name)) as data:
+                chunks.append({n: data[n] for n in data.files})
+    return to_frame(chunks)
+
+
+def split_notes(notes):
+    """
+    :return: the kind of notes and, if they are a tuple like ('contact', 1), their depth, or else -1
+    """
+    if isinstance(notes, tuple):
+        return notes[0], notes[1]
+    return ('' if notes is None else notes), -1
+
+
+def join_notes(kinds, depths):
+    """
+    :return: an array of the notes that were split into kinds and depths, as the tests had them
+    """
+    notes = kinds.astype(object)
+    for i in np.flatnonzero(depths >= 0).tolist():
+        notes[i] = (str(kinds[i]), int(depths[i]))
+    return notes
+
+
+def to_frame(chunks):
+    columns = {}
+    for name, dtype, missing in COLUMNS:
+        values = np.concatenate([c[name] for c in chunks]) if chunks else np.array([], dtype=dtype)
+        if name == 'notes':
+            depths = np.concatenate([c['contact_depth'] for c in chunks]) if chunks else np.array([], dtype=np.int64)
+            columns[name] = join_notes(values, depths)
+        elif missing is None or dtype is np.float64:
+            columns[name] = values
+        else:
+            columns[name] = pd.array(values.astype(bool) if name == 'positive' else values,
+                                     dtype='boolean' if name == 'positive' else 'Int64')
+            columns[name][values == missing] = pd.NA
+    return pd.DataFrame(columns)
@@ -0,0 +1,84 @@
+import contextlib
+import cProfile
+import pstats
+import time
+import tracemalloc
+from collections import defaultdict
+
+import pandas as pd
+
+
+class Timer:
+    """
+    Adds up the wall time and calls of each phase of a simulation, and counts of what happened in them, eg.
+    tests processed. Phases may be nested, as the society's steps are within 'manage outbreak'
+    """
+    on = True
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counts = defaultdict(int)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+            self.calls[name] += 1
+
+    def count(self, name, n=1):
+        self.counts[name] += n
+
+    def table(self):
+        """
+        :return: a dataframe with a row for each phase, of its calls, seconds and seconds per call, and a row
+        for each count
+        """
+        df = pd.DataFrame({'calls': pd.Series(self.calls, dtype=int), 'seconds': pd.Series(self.seconds, dtype=float)})
+        df['seconds per call'] = df.seconds / df.calls
+        counts = pd.DataFrame({'count': pd.Series(self.counts, dtype=int)})
+        return pd.concat([df, counts])
+
+
+class NoTimer:
+    """
+    A Timer that does nothing, for when a simulation is not timed
+    """
+    on = False
+    _phase = contextlib.nullcontext()
+
+    def phase(self, name):
+        return self._phase
+
+    def count(self, name, n=1):
+        pass
+
+
+NO_TIMER = NoTimer()
+
+
+class Profile:
+    """
+    A cProfile of the steps run while it is on, and a tracemalloc snapshot of the memory they allocated
+    """
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.tracing = tracemalloc.is_tracing()
+        if not self.tracing:
+            tracemalloc.start()
+        self.profiler.enable()
+
+    def stop(self):
+        """
+        :return: the pstats.Stats of the steps, and the tracemalloc.Snapshot at the end of them
+        """
+        self.profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        if not self.tracing:
+            tracemalloc.stop()
+        stats = pstats.Stats(self.profiler)
+        stats.stream = None     # which still prints to stdout, and lets the stats be pickled with the recorder
+        return stats, snapshot
@@ -1,4 +1,4 @@
-import random
+import functools
 import numpy as np
 
 from codit.society import Society
@@ -13,22 +13,14 @@ ALL_TIME_DAYS = 50
 def test_uk_ovespill_model():
     from codit.society.alternatives import UKSociety
     from codit.disease import Covid
-    random.seed(42)
-    np.random.seed(42)
     o = Outbreak(UKSociety(config=dict(PROB_NON_C19_SYMPTOMS_PER_DAY=0.1)),
-                 Covid(), pop_size=1000, seed_size=20, n_days=ALL_TIME_DAYS)
+                 Covid(), pop_size=1000, seed_size=20, n_days=ALL_TIME_DAYS, seed=42)
     o.simulate()
-
-    # Skip this test because the the simulator is not deterministic.
-    # I believe it is because it uses np.random by calls multi-threaded numpy code.
-    # TODO: I believe the correct solution is for the simulator to be constructed with its own np.random.RandomState class
-    #
-    return
-    np.testing.assert_allclose(o.recorder.story[40:45] == [[41.0, 0.035, 0.0, 0.007, 0.467, 0.452],
-                                                           [42.0, 0.035, 0.0, 0.007, 0.458, 0.442],
-                                                           [43.0, 0.035, 0.0, 0.007, 0.461, 0.447],
-                                                           [44.0, 0.035, 0.0, 0.007, 0.458, 0.448],
-                                                           [45.0, 0.035, 0.0, 0.007, 0.457, 0.448]])
+    np.testing.assert_allclose(o.recorder.story[40:45], [[41.0, 0.022, 0.0, 0.007, 0.469, 0.436],
+                                                         [42.0, 0.022, 0.0, 0.007, 0.47, 0.445],
+                                                         [43.0, 0.022, 0.0, 0.007, 0.456, 0.438],
+                                                         [44.0, 0.022, 0.0, 0.007, 0.466, 0.445],
+                                                         [45.0, 0.022, 0.0, 0.007, 0.467, 0.459]])
 
 
 def test_covid_model():
@@ -40,17 +32,14 @@ def test_covid_model():
 
     d = Covid(days_infectious=10, pr_transmission_per_day=0.2)
     # seed size is the number of people in the population who we seed as being infected:
-    random.seed(42)
-    o = Outbreak(s, d, pop_size=1000, seed_size=20, n_days=ALL_TIME_DAYS)
+    o = Outbreak(s, d, pop_size=1000, seed_size=20, n_days=ALL_TIME_DAYS, seed=42)
     # so, this is a village of 10000 people with 2 starting off infected
-
-    random.seed(42)
     o.simulate()
-    np.testing.assert_allclose(o.recorder.story[90:95], [[18.2, 0.103, 0.044, 0.0, 0.0, 0.023],
-                                                         [18.4, 0.103, 0.046, 0.0, 0.0, 0.023],
-                                                         [18.6, 0.103, 0.045, 0.0, 0.0, 0.021],
-                                                         [18.8, 0.105, 0.043, 0.0, 0.0, 0.019],
-                                                         [19.0, 0.105, 0.043, 0.0, 0.0, 0.017]])
+    np.testing.assert_allclose(o.recorder.story[90:95], [[18.2, 0.057, 0.017, 0.0, 0.001, 0.009],
+                                                         [18.4, 0.057, 0.017, 0.0, 0.001, 0.008],
+                                                         [18.6, 0.058, 0.017, 0.0, 0.001, 0.007],
+                                                         [18.8, 0.058, 0.017, 0.0, 0.001, 0.007],
+                                                         [19.0, 0.059, 0.017, 0.005, 0.0, 0.007]])
 """
 Day 9, prop infected is 0.061, prop infectious is 0.061
 Day 19, prop infected is 0.141, prop infectious is 0.08
@@ -63,11 +52,11 @@ Day 50, prop infected is 0.34, prop infectious is 0.046
 
 def test_draconian_population_model():
     from codit.society.basic import DraconianSociety
-    random.seed(42)
     s = DraconianSociety(episodes_per_day=5, encounter_size=2)
     d = Disease(days_infectious=10, pr_transmission_per_day=0.2)
     # seed size is the number of people in the population who we seed as being infected:
-    o = Outbreak(s, d, pop_size=1000, seed_size=2, n_days=ALL_TIME_DAYS, population_type=Population, person_type=Person)
+    o = Outbreak(s, d, pop_size=1000, seed_size=2, n_days=ALL_TIME_DAYS, population_type=Population, person_type=Person,
+                 seed=42)
     # so, this is a village of 10000 people with 2 starting off infected
     o.simulate()
     np.testing.assert_allclose(o.recorder.story[90:95], [[18.2, 0.002, 0.0, 0.0, 0.0, 0.0],
@@ -77,16 +66,53 @@ def test_draconian_population_model():
                                                          [19.0, 0.002, 0.0, 0.0, 0.0, 0.0]])
 
 
-def test_toy_model():
-    random.seed(42)
+def toy_outbreak(population_type=Population):
     s = Society(episodes_per_day=5, encounter_size=2)
     d = Disease(days_infectious=10, pr_transmission_per_day=0.2)
     # seed size is the number of people in the population who we seed as being infected:
-    o = Outbreak(s, d, pop_size=1000, seed_size=2, n_days=ALL_TIME_DAYS, population_type=Population, person_type=Person)
+    return Outbreak(s, d, pop_size=1000, seed_size=2, n_days=ALL_TIME_DAYS, population_type=population_type,
+                    person_type=Person, seed=42)
+
+
+def test_toy_model():
+    o = toy_outbreak()
     # so, this is a village of 10000 people with 2 starting off infected
     o.simulate()
-    np.testing.assert_allclose(o.recorder.story[90:95], [[18.2, 0.619,  0.57, 0.0, 0.0, 0.0],
-                                                         [18.4, 0.643, 0.592, 0.0, 0.0, 0.0],
-                                                         [18.6, 0.656, 0.603, 0.0, 0.0, 0.0],
-                                                         [18.8, 0.673, 0.618, 0.0, 0.0, 0.0],
-                                                         [19.0,  0.69, 0.635, 0.0, 0.0, 0.0]])
+    np.testing.assert_allclose(o.recorder.story[90:95], [[18.2, 0.04, 0.037, 0.0, 0.0, 0.0],
+                                                         [18.4, 0.042, 0.039, 0.0, 0.0, 0.0],
+                                                         [18.6, 0.045, 0.042, 0.0, 0.0, 0.0],
+                                                         [18.8, 0.051, 0.048, 0.0, 0.0, 0.0],
+                                                         [19.0, 0.054, 0.051, 0.0, 0.0, 0.0]])
+
+
+def test_toy_model_tracking_active():
+    # people of the toy model never worry, so following only the active ones should change nothing
+    o = toy_outbreak(functools.partial(Population, track_active=True))
+    o.simulate()
+    expected = toy_outbreak()
+    expected.simulate()
+    np.testing.assert_array_equal(o.recorder.story, expected.recorder.story)
+
+
+def test_covid_model_tracking_active():
+    from codit.society import TestingSociety
+    from codit.disease import Covid
+    from codit.population import FixedNetworkPopulation
+    s = TestingSociety(episodes_per_day=5, config={"MEAN_NETWORK_SIZE": 2, "PROB_NON_C19_SYMPTOMS_PER_DAY": 0.05})
+    o = Outbreak(s, Covid(days_infectious=10, pr_transmission_per_day=0.2), pop_size=1000, seed_size=20,
+                 n_days=ALL_TIME_DAYS, population_type=functools.partial(FixedNetworkPopulation, track_active=True),
+                 seed=0)
+    o.simulate()
+    assert o.pop.active >= {p.idx for p in o.pop.people if not p.quiescent}
+    assert 0.1 < o.recorder.story[-1][1] < 0.9
+    assert len(s.test_recorder) > 0.05 * ALL_TIME_DAYS * 1000 * 0.5
+
+
+def test_toy_model_event_driven():
+    # the toy disease draws nothing as it progresses, so scheduling its milestones should change nothing
+    o = toy_outbreak(functools.partial(Population, track_active=True, event_driven=True))
+    o.simulate()
+    expected = toy_outbreak()
+    expected.simulate()
+    np.testing.assert_array_equal(o.recorder.story, expected.recorder.story)
+    assert all(p.time_since_infection == 5 * 10 for p in o.pop.people if p.immune)
@@ -0,0 +1,50 @@
+import numpy as np
+
+from codit.society import Society
+from codit.disease import Disease, Covid
+from codit.outbreak import Outbreak
+from codit.population import Population
+from codit.population.person import Person
+from codit.population.covid import PersonCovid
+from codit.population.arrays import ArrayPerson, ArrayPersonCovid
+
+ALL_TIME_DAYS = 30
+
+
+def run_outbreak(person_type, disease, society):
+    o = Outbreak(society, disease, pop_size=1000, seed_size=10, n_days=ALL_TIME_DAYS,
+                 population_type=Population, person_type=person_type, seed=42)
+    o.simulate()
+    return o
+
+
+def test_array_people_match_object_people():
+    s = Society(episodes_per_day=2, encounter_size=2, config=dict(PROB_NON_C19_SYMPTOMS_PER_DAY=0.05))
+    d = Covid(pr_transmission_per_day=0.3)
+    expected = run_outbreak(PersonCovid, d, s)
+    o = run_outbreak(ArrayPersonCovid, d, s)
+    np.testing.assert_allclose(o.recorder.story, expected.recorder.story)
+    assert o.recorder.realized_r0 == expected.recorder.realized_r0
+    assert o.pop.arrays.infected.sum() == len(expected.pop.infected())
+    # an array person holds the rest of their state in slots, without a __dict__ of their own
+    assert not any(vars(p) for p in o.pop.people)
+    assert any(vars(p) for p in expected.pop.people)
+
+
+def test_array_toy_model():
+    s = Society(episodes_per_day=5, encounter_size=2)
+    d = Disease(days_infectious=10, pr_transmission_per_day=0.2)
+    expected = run_outbreak(Person, d, s)
+    o = run_outbreak(ArrayPerson, d, s)
+    np.testing.assert_allclose(o.recorder.story, expected.recorder.story)
+
+    victims = {p.idx: {v.idx for v in p.victims} for p in o.pop.people if p.infected}
+    assert victims == {p.idx: {v.idx for v in p.victims} for p in expected.pop.people if p.infected}
+    by_infector = o.pop.arrays.victims()
+    assert o.pop.arrays.victims() is by_infector
+    np.testing.assert_array_equal(by_infector.lengths(), o.pop.arrays.n_victims)
+    infector = next(p for p in o.pop.people if p.infectious)
+    victim = next(p for p in o.pop.people if not p.infected)
+    victim.set_infected(d, infector=infector)
+    assert victim in infector.victims
+    assert [p.idx for p in o.pop.people[-1].chain()] == [p.idx for p in expected.pop.people[-1].chain()]
@@ -0,0 +1,14 @@
+import numpy as np
+
+from codit.society import Society
+from codit.benchmark import main, load_results, compare, SOCIETIES, POPULATIONS
+
+
+def test_benchmarks_save_json(tmp_path):
+    path = tmp_path / 'benchmarks.json'
+    main(['--sizes', '2000', '--days', '2', '--out', str(path)])
+    df = load_results(path)
+    assert len(df) == len(POPULATIONS) + len(SOCIETIES) + 1
+    assert (df.seconds > 0).all() and (df.peak_bytes > 0).all()
+    assert df.loc[('simulate', 'LateralFlowUK', 2000), 'periods'] == 2 * Society().episodes_per_day
+    np.testing.assert_array_equal(compare(path, path)['seconds ratio'], 1.)
@@ -0,0 +1,58 @@
+import functools
+import os
+
+import numpy as np
+
+from codit.outbreak import Outbreak
+from codit.rng import RandomStream
+from codit.society import Society
+from codit.society.lateral import LateralFlowUK
+from codit.disease import Covid
+from codit.population.cache import NetworkCache
+from codit.population.networks.city import CityPopulation, CLIQUE_KINDS
+from codit.population.transmission import VECTORIZED
+
+
+def run_city(cache_dir, seed=42):
+    population_type = functools.partial(CityPopulation, transmission=VECTORIZED, network_cache=cache_dir)
+    o = Outbreak(LateralFlowUK(), Covid(), pop_size=8000, seed_size=100, n_days=20,
+                 population_type=population_type, seed=seed)
+    o.simulate()
+    return o
+
+
+def test_cached_network_gives_same_outbreak(tmp_path):
+    built = run_city(tmp_path)
+    assert len(os.listdir(tmp_path)) == 1
+    loaded = run_city(tmp_path)
+    assert len(os.listdir(tmp_path)) == 1
+
+    assert isinstance(loaded.pop.cliques.indices.base, np.memmap)
+    for a, b in [(built.pop.cliques, loaded.pop.cliques), (built.pop.contacts.csr, loaded.pop.contacts.csr)]:
+        np.testing.assert_array_equal(a.indptr, b.indptr)
+        np.testing.assert_array_equal(a.indices, b.indices)
+    assert [p.age for p in built.pop.people] == [p.age for p in loaded.pop.people]
+    np.testing.assert_array_equal(built.pop.clique_kinds, loaded.pop.clique_kinds)
+    assert len(loaded.pop.clique_kinds) == len(loaded.pop.cliques)
+    assert CLIQUE_KINDS[loaded.pop.clique_kinds[0]] == 'households'
+    np.testing.assert_array_equal(built.recorder.story, loaded.recorder.story)
+
+    run_city(NetworkCache(tmp_path), seed=43)
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_key_tells_apart_builders(tmp_path):
+    class CityPopulation2(CityPopulation):
+        pass
+
+    CityPopulation2.__name__ = 'CityPopulation'
+
+    class Rebuilt(CityPopulation):
+        NETWORK_VERSION = CityPopulation.NETWORK_VERSION + 1
+
+    cache, society = NetworkCache(tmp_path), Society()
+    keys = [cache.key(pt(200, society, rng=RandomStream(42)), society)
+            for pt in (CityPopulation, CityPopulation, CityPopulation2, Rebuilt)]
+    assert keys[0] == keys[1]
+    assert keys[0].startswith('CityPopulation-200-') and keys[2].startswith('CityPopulation-200-')
+    assert len(set(keys)) == 3
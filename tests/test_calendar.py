@@ -0,0 +1,52 @@
+import functools
+
+from codit.society import Society, TestingSociety
+from codit.disease import Covid
+from codit.outbreak import Outbreak
+from codit.population import Population, FixedNetworkPopulation
+from codit.population.covid import PersonCovid
+
+
+def test_covid_milestones():
+    s = Society(episodes_per_day=2)
+    d = Covid(days_infectious=4, pr_transmission_per_day=0.2)
+    d.days_before_infectious, d.days_to_symptoms, d.prob_symptomatic = 1.5, 1, 1.
+    pop = Population(10, s, person_type=PersonCovid, event_driven=True)
+    p = pop.people[3]
+    p.set_infected(d)
+    assert sorted(pop.calendar.buckets) == [3, 5, 11]
+
+    infectious, symptomatic = [], []
+    for _ in range(12):
+        pop.update_time()
+        infectious.append(p.infectious)
+        symptomatic.append(p.symptomatic)
+    assert infectious == [False] * 2 + [True] * 8 + [False] * 2
+    assert symptomatic == [False] * 4 + [True] * 6 + [False] * 2
+    assert p.immune and p.time_since_infection == 11
+    assert not pop.calendar.buckets
+
+
+def test_seeding_on_calendar():
+    d = Covid(days_infectious=10, pr_transmission_per_day=0.2)
+    pop = Population(1000, Society(episodes_per_day=5), person_type=PersonCovid, event_driven=True, rng=42)
+    pop.seed_infections(200, d)
+    seeded = [p for p in pop.people if p.infected]
+    assert len(seeded) == 200
+    for p in seeded:
+        assert p.infectious == (d.days_before_infectious <= p.days_infected() < d.days_before_infectious + 10)
+    assert all(i >= 1 for i in pop.calendar.buckets)
+
+
+def test_covid_model_event_driven():
+    s = TestingSociety(episodes_per_day=5, config={"MEAN_NETWORK_SIZE": 2, "PROB_NON_C19_SYMPTOMS_PER_DAY": 0.05})
+    d = Covid(days_infectious=10, pr_transmission_per_day=0.2)
+    o = Outbreak(s, d, pop_size=1000, seed_size=20, n_days=50, seed=42,
+                 population_type=functools.partial(FixedNetworkPopulation, track_active=True, event_driven=True))
+    o.simulate()
+    assert 0.1 < o.recorder.story[-1][1] < 0.9
+    o.pop.update_time()
+    # only isolating people need updating each period, the calendar moves on everyone's disease
+    assert all(o.pop.people[i].isolating for i in o.pop.active)
+    ongoing = [p for p in o.pop.people if p.disease is not None]
+    assert all(p.periods_infected() < 5 * (d.days_before_infectious + d.days_infectious) for p in ongoing)
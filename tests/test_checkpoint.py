@@ -0,0 +1,46 @@
+import functools
+
+import numpy as np
+import pytest
+
+from codit.checkpoint import load_checkpoint
+from codit.outbreak import Outbreak
+from codit.society import Society, TestingTracingSociety
+from codit.society.lateral import LateralFlowUK
+from codit.disease import Covid, Disease
+from codit.population import Population, FixedNetworkPopulation
+from codit.population.person import Person
+from codit.population.arrays import ArrayPersonCovid
+from codit.population.transmission import VECTORIZED
+
+VECTORIZED_NETWORK = functools.partial(FixedNetworkPopulation, transmission=VECTORIZED)
+
+SETUPS = {
+    'tracing': lambda: Outbreak(TestingTracingSociety(episodes_per_day=2), Covid(), pop_size=2000, seed_size=20,
+                                n_days=30, population_type=VECTORIZED_NETWORK, seed=42),
+    'lateral': lambda: Outbreak(LateralFlowUK(config=dict(SIMULATOR_PERIODS_PER_DAY=2)), Covid(), pop_size=2000,
+                                seed_size=20, n_days=30, population_type=VECTORIZED_NETWORK, seed=42),
+    'arrays': lambda: Outbreak(TestingTracingSociety(episodes_per_day=2), Covid(), pop_size=2000, seed_size=20,
+                               n_days=30, population_type=VECTORIZED_NETWORK, person_type=ArrayPersonCovid,
+                               seed=42),
+    'toy': lambda: Outbreak(Society(episodes_per_day=2, encounter_size=2),
+                            Disease(days_infectious=10, pr_transmission_per_day=0.2), pop_size=500, seed_size=2, n_days=30, person_type=Person, seed=42,
+                            population_type=functools.partial(Population, track_active=True, event_driven=True)),
+}
+
+
+@pytest.mark.parametrize('setup', SETUPS)
+def test_resume_from_checkpoint(setup, tmp_path):
+    reference = SETUPS[setup]()
+    reference.simulate()
+
+    path = tmp_path / 'outbreak.npz'
+    stopped = SETUPS[setup]()
+    stopped.simulate(n_days=17, checkpoint=path, checkpoint_days=5)
+    resumed = load_checkpoint(path)
+    assert resumed.step_num == 15 * 2
+    assert resumed.pop.count_infected() == len(resumed.pop.infected())
+    resumed.simulate()
+    np.testing.assert_array_equal(resumed.recorder.story, reference.recorder.story)
+    assert {p: p.infector for p in resumed.pop.people if p.infector} == \
+        {v: p for p in resumed.pop.people for v in p.victims}
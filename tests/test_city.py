@@ -6,9 +6,10 @@ from codit.society import UKSociety
 from codit.population.population import Population
 from codit.population.networks.city import build_households
 from codit.population.networks.city import build_class_groups
-from codit.population.networks.city import is_care_home
+from codit.population.networks.city import is_care_home, care_home_rows, build_city_clique_groups
 from codit.population.networks.city_config import city_cfg as cfg
 from codit.population.networks.city_config import typical_households as thh
+from codit.rng import RandomStream
 
 POP_SIZE = 23000
 
@@ -19,7 +20,7 @@ def setup_population():
 
 
 def setup_households(people):
-    return build_households(people)  # creates households & sets ages
+    return build_households(people, RandomStream(42))  # creates households & sets ages
 
 
 def test_pop():
@@ -35,12 +36,14 @@ def test_classroom_age():
     """
     people = setup_population()
     setup_households(people)
-    classrooms = build_class_groups(people)
-    ages = [s.age for room in classrooms for s in room]
+    ages = np.array([p.age for p in people])
+    classrooms = build_class_groups(ages, RandomStream(42))
+    class_ages = ages[classrooms.indices]
 
-    assert min(ages) == cfg.MINIMUM_CLASS_AGE
-    assert max(ages) == cfg.MAXIMUM_CLASS_AGE
-    assert all(p.age == cfg.MINIMUM_CLASS_AGE for p in classrooms[0])
+    assert min(class_ages) == cfg.MINIMUM_CLASS_AGE
+    assert max(class_ages) == cfg.MAXIMUM_CLASS_AGE
+    assert all(len(set(ages[classrooms.row(i)])) == 1 for i in range(len(classrooms)))
+    assert max(classrooms.lengths()) == 30
 
 
 def test_care_homes():
@@ -48,18 +51,47 @@ def test_care_homes():
      - (1) MIN care home age must be MAXIMUM_WORKING_AGE
     """
     people = setup_population()
-    houses = build_households(people)
-    care_homes = [h for h in houses if is_care_home(h)]
-    ages = [s.age for room in care_homes for s in room]
-
-    assert min(ages) == cfg.MAXIMUM_WORKING_AGE
+    houses = build_households(people, RandomStream(42))
+    ages = np.array([p.age for p in people])
+    care_homes = np.flatnonzero(care_home_rows(houses, ages))
+    assert len(care_homes) > 0
+    assert min(ages[houses.take(care_homes).indices]) == cfg.MAXIMUM_WORKING_AGE
+    assert all(is_care_home({people[i] for i in houses.row(h)}) for h in care_homes)
 
 
 def test_house_size():
     """
      - (1) normal houses should build houses of size; house_size
     """
-    houses = thh.house(10, cfg.SENIOR_WEIGHT, house_size=3)
-    mean = np.mean([len(home) for home in houses])
+    houses = thh.house(10, cfg.SENIOR_WEIGHT, RandomStream(42), house_size=3)
+    mean = np.mean(houses.lengths())
+
+    assert mean == 3
+
+
+def test_households_hold_everyone():
+    people = setup_population()
+    houses = setup_households(people)
+    np.testing.assert_array_equal(houses.indices, np.arange(POP_SIZE))
+    assert all(0 <= p.age < 100 for p in people)
+
+    examples = thh.build_characteristic_households(RandomStream(42), 10000)
+    assert examples.indptr[-1] == len(examples.indices)
+    children = thh.poisson_house(100, cfg.CHILD_WEIGHT, 1.6, RandomStream(42), case=2, weight_2=cfg.PARENT_WEIGHT)
+    assert all(max(children.row(i)) >= 25 and min(children.row(i)) < 20 for i in range(len(children)))
 
-    assert mean == 3
\ No newline at end of file
+
+def test_city_clique_groups():
+    people = setup_population()
+    households, workplaces, classrooms, care_homes = build_city_clique_groups(people, RandomStream(42))
+    ages = np.array([p.age for p in people])
+    working = (cfg.MINIMUM_WORKING_AGE < ages) & (ages < cfg.MAXIMUM_WORKING_AGE)
+
+    assert set(households.indices.tolist()) == set(range(POP_SIZE))
+    assert len(set(workplaces.indices.tolist())) == len(workplaces.indices)
+    assert working[workplaces.indices].all()
+    teachers = classrooms.indices[classrooms.indptr[1:] - 1]
+    assert not set(teachers.tolist()) & set(workplaces.indices.tolist())
+    assert working[teachers].all()
+    carers = care_homes.indices[working[care_homes.indices]]
+    assert set(np.flatnonzero(working)) == set(workplaces.indices) | set(teachers) | set(carers)
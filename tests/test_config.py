@@ -0,0 +1,41 @@
+import pytest
+
+from codit.config import CFG, set_config
+from codit.society import Society
+from codit.population import Population
+from codit.population.person import Person
+
+
+def test_people_share_their_society_config():
+    s = Society(config=dict(PROB_ISOLATE_IF_TRACED=0.5))
+    people = Population(100, s).people
+    assert all(p.cfg is s.cfg for p in people)
+    assert people[0].cfg.PROB_ISOLATE_IF_TRACED == 0.5
+    assert people[0].cfg.DURATION_OF_ISOLATION == CFG.DURATION_OF_ISOLATION
+
+    p = Person(s, config=dict(DURATION_OF_ISOLATION=7))
+    assert p.cfg.DURATION_OF_ISOLATION == 7 and p.cfg is not s.cfg
+    assert Society().cfg is Society(config={}).cfg is not s.cfg
+
+
+def test_config_is_checked_and_cannot_be_changed():
+    with pytest.raises(AttributeError, match="unrecognised"):
+        Society(config=dict(NO_SUCH_PARAMETER=1))
+    s = Society()
+    with pytest.raises(AttributeError, match="shared"):
+        s.cfg.DURATION_OF_ISOLATION = 3
+    set_config(s, dict(DURATION_OF_ISOLATION=3))
+    assert s.cfg.DURATION_OF_ISOLATION == 3 and Society().cfg.DURATION_OF_ISOLATION == CFG.DURATION_OF_ISOLATION
+
+
+def test_shared_config_cannot_be_changed_through_its_dict():
+    s, other = Society(config=dict(DURATION_OF_ISOLATION=7)), Society(config=dict(DURATION_OF_ISOLATION=7))
+    assert s.cfg is other.cfg
+    for change in (lambda: s.cfg.__dict__.update(DURATION_OF_ISOLATION=3),
+                   lambda: vars(s.cfg).__setitem__('PROB_ISOLATE_IF_TRACED', 1),
+                   lambda: Society().cfg.__dict__.update(DURATION_OF_ISOLATION=3)):
+        with pytest.raises((TypeError, AttributeError)):
+            change()
+    assert other.cfg.DURATION_OF_ISOLATION == 7 and other.cfg.PROB_ISOLATE_IF_TRACED == CFG.PROB_ISOLATE_IF_TRACED
+    assert Society().cfg.DURATION_OF_ISOLATION == CFG.DURATION_OF_ISOLATION
+    assert dict(other.cfg.__dict__) == dict(DURATION_OF_ISOLATION=7)
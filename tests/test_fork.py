@@ -0,0 +1,63 @@
+import functools
+import sys
+
+import numpy as np
+
+from codit.outbreak import Outbreak
+from codit.society import Society, TestingTracingSociety, UKSociety
+from codit.disease import Covid, Disease
+from codit.population import Population, FixedNetworkPopulation
+from codit.population.person import Person
+from codit.population.transmission import VECTORIZED
+
+
+def outbreak():
+    return Outbreak(TestingTracingSociety(episodes_per_day=2), Covid(), pop_size=2000, seed_size=20, n_days=30,
+                    population_type=functools.partial(FixedNetworkPopulation, transmission=VECTORIZED), seed=42)
+
+
+def test_fork_carries_on_as_the_original():
+    reference = outbreak()
+    reference.simulate()
+
+    o = outbreak()
+    o.simulate(n_days=15)
+    assert len(o.recorder.story) == 30
+    branch = o.fork()
+    assert branch.pop.cliques is o.pop.cliques
+    assert branch.pop.people[0] is not o.pop.people[0]
+    branch.simulate()
+    o.simulate()
+    np.testing.assert_array_equal(branch.recorder.story, reference.recorder.story)
+    np.testing.assert_array_equal(o.recorder.story, reference.recorder.story)
+
+
+def test_fork_under_other_policies():
+    o = outbreak()
+    o.simulate(n_days=15)
+    snapshot = o.snapshot()
+    branches = [snapshot.fork(society=UKSociety(episodes_per_day=2)), snapshot.fork(seed=1), snapshot.fork(seed=2)]
+    for branch in branches:
+        branch.simulate()
+        np.testing.assert_array_equal(branch.recorder.story[:30], o.recorder.story)
+        assert len(branch.recorder.story) == 60
+    assert all(p.society is branches[0].society for p in branches[0].pop.people)
+    assert branches[1].recorder.story[-1] != branches[2].recorder.story[-1]
+
+
+def test_snapshot_of_a_long_chain_of_infection():
+    o = Outbreak(Society(episodes_per_day=1), Disease(days_infectious=10, pr_transmission_per_day=0.2),
+                 pop_size=20000, population_type=Population, person_type=Person, seed=42)
+    people = o.pop.people
+    people[0].set_infected(o.disease)
+    for infector, victim in zip(people, people[1:]):
+        victim.set_infected(o.disease, infector=infector)
+        infector.add_victim(victim)
+
+    limit = sys.getrecursionlimit()
+    branch = o.snapshot()
+    assert sys.getrecursionlimit() == limit
+    copied = branch.pop.people
+    assert len(copied[-1].chain()) == 20000
+    assert copied[-1].infector is copied[-2] and copied[-2].victims == {copied[-1]}
+    assert copied[-1] is not people[-1] and copied[-1].society is branch.society
@@ -0,0 +1,48 @@
+import functools
+import os
+
+import pandas as pd
+
+from codit.looper import Looper
+from codit.society import TestingTracingSociety, UKSociety
+from codit.disease import Covid
+from codit.population import FixedNetworkPopulation
+from codit.population.networks.household_workplace import HouseholdWorkplacePopulation
+from codit.population.transmission import VECTORIZED
+
+
+def test_looper_replicas_are_reproducible():
+    policies = {'tracing': TestingTracingSociety, 'uk': functools.partial(UKSociety, config=dict(
+        PROB_NON_C19_SYMPTOMS_PER_DAY=0.05))}
+    kwargs = dict(pop_size=500, seed_size=10, n_days=10)
+    df = Looper(policies, Covid(), n_replicas=3, seed=42, n_workers=2, **kwargs).run()
+
+    assert len(df) == 2 * 3 * 10 * UKSociety().episodes_per_day
+    assert set(df.policy) == set(policies) and set(df.replica) == {0, 1, 2}
+    assert df.groupby(['policy', 'replica'])['ever infected'].last().nunique() > 1
+    pd.testing.assert_frame_equal(df, Looper(policies, Covid(), n_replicas=3, seed=42, n_workers=1, **kwargs).run())
+
+
+def test_looper_replicas_share_one_network(tmp_path):
+    policies = {'tracing': TestingTracingSociety}
+    kwargs = dict(pop_size=500, seed_size=10, n_days=10,
+                  population_type=functools.partial(FixedNetworkPopulation, transmission=VECTORIZED))
+    df = Looper(policies, Covid(), n_replicas=3, seed=42, n_workers=2, share_network=True, network_cache=tmp_path,
+                **kwargs).run()
+    assert len(os.listdir(tmp_path)) == 1
+    assert df.groupby('replica')['ever infected'].last().nunique() > 1
+    pd.testing.assert_frame_equal(df, Looper(policies, Covid(), n_replicas=3, seed=42, n_workers=1,
+                                             share_network=True, **kwargs).run())
+
+
+def test_looper_policies_share_networks_and_draws():
+    # households and workplaces are cliques of more than two, through which the pairwise loop must draw in the
+    # same order in every process, so that two names for one policy give the same replicas wherever they run
+    policies = {'tracing': TestingTracingSociety, 'tracing again': TestingTracingSociety}
+    kwargs = dict(pop_size=1000, seed_size=10, n_days=10, population_type=HouseholdWorkplacePopulation)
+    df = Looper(policies, Covid(), n_replicas=2, seed=42, n_workers=2, **kwargs).run()
+
+    tracing, again = (df[df.policy == name].drop(columns='policy').reset_index(drop=True) for name in policies)
+    pd.testing.assert_frame_equal(tracing, again)
+    assert df.groupby('replica')['ever infected'].last().nunique() > 1
+    pd.testing.assert_frame_equal(df, Looper(policies, Covid(), n_replicas=2, seed=42, n_workers=2, **kwargs).run())
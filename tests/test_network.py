@@ -0,0 +1,84 @@
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+from codit.society import Society
+from codit.society.test import Test
+from codit.population.covid import PersonCovid
+from codit.population.network import CSR, contact_matrix
+from codit.population import Population
+from codit.population.networks.household_workplace import HouseholdWorkplacePopulation, build_cliques, to_networkx
+from codit.population.networks.radial_age import Grid, cliques_at, locate_population, neighbour_cliques
+from codit.rng import RandomStream
+
+
+def test_contact_matrix():
+    cliques = CSR.from_rows([{0, 1, 2}, {2, 3}, {1, 2}, {5}])
+    contacts = contact_matrix(cliques, 6)
+    assert [contacts.row(i).tolist() for i in range(6)] == [[1, 2], [0, 2], [0, 1, 3], [2], [], []]
+    memberships = cliques.transpose(6)
+    assert [memberships.row(i).tolist() for i in range(6)] == [[0], [0, 2], [0, 1, 2], [1], [], [3]]
+
+
+def test_contacts_match_cliques():
+    pop = HouseholdWorkplacePopulation(2000, Society(), person_type=PersonCovid, rng=42)
+    expected = defaultdict(set)
+    for clique in pop.fixed_cliques:
+        for p in clique:
+            expected[p] |= set(clique) - {p}
+
+    assert all(set(p.contacts) == expected[p] for p in pop.people)
+    np.testing.assert_array_equal(pop.contacts.valencies, [len(expected[p]) for p in pop.people])
+    assert all(p.valency == len(expected[p]) for p in pop.people)
+
+
+def test_susceptible_contact_counts():
+    society = Society()
+    society.TEST_DIAGNOSTICS = True
+    pop = HouseholdWorkplacePopulation(2000, society, person_type=PersonCovid, rng=42)
+    for p in pop.rng.sample(pop.people, 500):
+        p.infected = True
+    n_susceptible, n_second = pop.contacts.susceptible_contact_counts(pop.state_masks()[1])
+    for p in pop.people[:300]:
+        t = Test(p, 'diagnostics', 1)
+        assert (n_susceptible[p.idx], n_second[p.idx]) == (t._succeptible_contacts,
+                                                           t._succeptible_contacts_of_contacts)
+
+
+def test_household_workplace_cliques_are_maximal():
+    nx = pytest.importorskip('networkx')
+    people = Population(3000, Society()).people
+    cliques = build_cliques(people, RandomStream(42))
+    expected = {frozenset(c) for c in nx.find_cliques(to_networkx(cliques, len(people))) if len(c) > 1}
+    assert {frozenset(cliques.row(i).tolist()) for i in range(len(cliques))} == expected
+
+
+def test_radial_age_cliques_are_neighbours():
+    rng = RandomStream(42)
+    people = Population(3000, Society()).people
+    coord = locate_population(people, rng)
+    cliques = neighbour_cliques(coord, 95, 15, 40, 9 * len(people), rng)
+    sizes = cliques.lengths()
+    assert 2 <= sizes.min() and sizes.max() <= 40
+    assert (sizes * (sizes - 1)).sum() >= 9 * len(people)
+    for i in range(len(cliques)):
+        members = cliques.row(i)
+        assert len(set(members.tolist())) == len(members)
+        assert ((coord[members, None] - coord[members]) ** 2).sum(axis=2).max() < 30 ** 2
+
+
+def test_radial_age_cliques_are_full_in_crowded_places():
+    rng = RandomStream(42)
+    angle, distance = rng.random(20000) * 2 * np.pi, 20 * np.sqrt(rng.random(20000))
+    coord = distance[:, None] * np.stack([np.sin(angle), np.cos(angle)], axis=1)
+    grid = Grid(coord, 35, 15)
+    places = rng.uniform(-35, 35, size=(300, 2))
+    cliques = cliques_at(places, coord, grid, 15, 40, 120, rng)
+    n_near = (((coord[None] - places[:, None]) ** 2).sum(axis=2) < 15 ** 2).sum(axis=1)
+    assert (n_near > 1000).any() and (n_near == 0).any()
+    np.testing.assert_array_equal(cliques.lengths(), np.minimum(n_near, 40))
+    for i in range(len(cliques)):
+        members = cliques.row(i)
+        assert len(set(members.tolist())) == len(members)
+        assert (((coord[members] - places[i]) ** 2).sum(axis=1) < 15 ** 2).all()
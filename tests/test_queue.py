@@ -0,0 +1,90 @@
+import random
+
+from codit.society import Society
+from codit.society.test import TestQueue
+
+
+class Patient:
+    society = Society()
+    contacts = ()
+    infected = False
+    isolating = False
+
+    def __init__(self, name):
+        self.name = name
+        self.infectious = random.random() < 0.5
+
+
+class ListQueue:
+    """
+    The queue as a plain list, ticking each test along, to check TestQueue against
+    """
+    def __init__(self):
+        self.tests = []
+
+    def add_test(self, person, notes, time_to_complete, front_of_queue=False, days_delayed_start=0):
+        test = dict(person=person, days_elapsed=0, swab_taken=False, days_delayed_start=days_delayed_start,
+                    days_to_complete=time_to_complete + days_delayed_start)
+        self.tests.insert(0, test) if front_of_queue else self.tests.append(test)
+
+    def update_tests(self, dt):
+        for t in self.tests:
+            if t['days_delayed_start'] + dt > t['days_elapsed'] >= t['days_delayed_start']:
+                t['swab_taken'] = True
+            t['days_elapsed'] += dt
+
+    def pick_actionable_tests(self, max_processed):
+        swabbed = [t for t in self.tests if t['swab_taken']][:max_processed]
+        return [t for t in swabbed if t['days_elapsed'] >= t['days_to_complete']]
+
+
+def test_queue_matches_list():
+    random.seed(42)
+    queue, expected = TestQueue(), ListQueue()
+    dt = 1 / 3
+    for step in range(300):
+        for _ in range(random.randint(0, 12)):
+            args = (Patient(f"{step}-{_}"), 'notes', random.choice([0.02, 1, random.random() * 3]),
+                    random.random() < 0.2, random.choice([0, 0, 1, random.random() * 2]))
+            queue.add_test(*args)
+            expected.add_test(*args)
+        if step % 5 == 0:
+            queue.remove_planned_tests_older_than(1.5)
+            expected.tests = [t for t in expected.tests if t['swab_taken'] or t['days_elapsed'] <= 1.5]
+        queue.update_tests(dt)
+        expected.update_tests(dt)
+
+        max_processed = random.randint(0, 10)
+        picked = queue.pick_actionable_tests(max_processed)
+        assert [t.person for t in picked] == [t['person'] for t in expected.pick_actionable_tests(max_processed)]
+        for t in picked:
+            queue.remove_test(t)
+        expected.tests = [t for t in expected.tests if t['person'] not in {p.person for p in picked}]
+        assert [t.person for t in queue.tests] == [t['person'] for t in expected.tests if t['swab_taken']]
+        assert [round(t.days_elapsed, 9) for t in queue.planned_tests()] == \
+               [round(t['days_elapsed'], 9) for t in expected.tests if not t['swab_taken']]
+        assert queue.n_swabbed == sum(t['swab_taken'] for t in expected.tests)
+        for t in expected.tests:
+            assert queue.has_swabbed_test(t['person']) == t['swab_taken']
+            assert queue.has_planned_test(t['person']) != t['swab_taken']
+
+
+def test_queue_stays_compact():
+    random.seed(42)
+    queue, expected = TestQueue(), ListQueue()
+    for step in range(2000):
+        for _ in range(random.randint(0, 12)):
+            args = (Patient(f"{step}-{_}"), 'notes', 1, random.random() < 0.2, 0)
+            queue.add_test(*args)
+            expected.add_test(*args)
+        queue.update_tests(1)
+        expected.update_tests(1)
+        picked = queue.pick_actionable_tests(6)
+        assert [t.person for t in picked] == [t['person'] for t in expected.pick_actionable_tests(6)]
+        for t in picked:
+            queue.remove_test(t)
+        expected.tests = [t for t in expected.tests if t['person'] not in {p.person for p in picked}]
+    assert [t.person for t in queue.tests] == [t['person'] for t in expected.tests if t['swab_taken']]
+    live = len(expected.tests)
+    assert len(queue._swabbed_back.tree) < 4 * live + 200
+    assert len(queue._swabs) + len(queue._completions) + len(queue._ready) + len(queue._planned) < 8 * live + 200
@@ -0,0 +1,62 @@
+import functools
+
+import numpy as np
+import pandas as pd
+
+from codit.checkpoint import load_checkpoint
+from codit.outbreak import Outbreak, OutbreakRecorder, StreamingRecorder, read_recording
+from codit.society import TestingTracingSociety
+from codit.society.lateral import LateralFlowUK
+from codit.disease import Covid, covid_hazard
+from codit.population import FixedNetworkPopulation
+from codit.population.networks.city import CityPopulation
+from codit.population.transmission import VECTORIZED
+
+
+def test_counts_match_population():
+    o = Outbreak(LateralFlowUK(config=dict(SIMULATOR_PERIODS_PER_DAY=4, DAILY_TEST_CAPACITY_PER_HEAD=0.1)), Covid(),
+                 pop_size=8000, seed_size=100, n_days=40, population_type=CityPopulation, seed=42)
+    o.simulate()
+    people = o.pop.people
+    assert o.pop.count_infected() == len(o.pop.infected())
+    assert o.pop.count_infectious() == sum(p.infectious for p in people)
+    assert o.pop.count_isolating() == sum(p.isolating for p in people)
+    assert sum(q.n_swabbed for q in o.society.queues) == sum(len(list(q.tests)) for q in o.society.queues)
+
+    hazard = sum(covid_hazard(p.age) for p in o.pop.infected()) / sum(covid_hazard(p.age) for p in people)
+    np.testing.assert_allclose(o.recorder.hazard[-1], hazard)
+    assert list(o.recorder.get_dataframe().columns) == OutbreakRecorder.COLUMNS[1:]
+    np.testing.assert_array_equal(o.recorder.get_dataframe(hazard=True)['infected hazard'], o.recorder.hazard)
+
+
+def outbreak():
+    return Outbreak(TestingTracingSociety(episodes_per_day=2), Covid(), pop_size=2000, seed_size=20, n_days=30,
+                    population_type=functools.partial(FixedNetworkPopulation, transmission=VECTORIZED), seed=42)
+
+
+def test_streaming_recorder(tmp_path):
+    reference = outbreak()
+    reference.simulate()
+
+    path = tmp_path / 'story.bin'
+    o = outbreak()
+    o.set_recorder(StreamingRecorder(path))
+    o.simulate(n_days=17, checkpoint=tmp_path / 'outbreak.npz', checkpoint_days=5)
+    assert len(read_recording(path)) == 34
+    assert not o.recorder.file.closed
+    resumed = load_checkpoint(tmp_path / 'outbreak.npz')
+    assert resumed.recorder.file is None
+    resumed.simulate()
+    np.testing.assert_array_equal(resumed.recorder.story, reference.recorder.story)
+    pd.testing.assert_frame_equal(read_recording(path), reference.recorder.get_dataframe())
+    pd.testing.assert_frame_equal(read_recording(path, hazard=True), reference.recorder.get_dataframe(hazard=True))
+
+
+def test_recorder_samples_once_a_day():
+    reference = outbreak()
+    reference.simulate()
+    o = outbreak()
+    o.set_recorder(OutbreakRecorder(every='day'))
+    o.simulate()
+    np.testing.assert_array_equal(o.recorder.story, reference.recorder.story[1::2])
+    assert o.recorder.hazard == reference.recorder.hazard[1::2]
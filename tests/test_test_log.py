@@ -0,0 +1,74 @@
+import functools
+import os
+
+import pandas as pd
+
+from codit.outbreak import Outbreak
+from codit.society import TestingTracingSociety
+from codit.society.lateral import LateralFlowUK
+from codit.society.test_log import TestLog, load_test_log
+from codit.disease import Covid
+from codit.population import FixedNetworkPopulation
+from codit.population.transmission import VECTORIZED
+
+
+def outbreak(test_log=None):
+    s = TestingTracingSociety(episodes_per_day=2, test_log=test_log)
+    if test_log is not None:
+        s.test_recorder = TestLog(test_log, chunk_size=100)
+    return Outbreak(s, Covid(), pop_size=2000, seed_size=20, n_days=30,
+                    population_type=functools.partial(FixedNetworkPopulation, transmission=VECTORIZED), seed=42)
+
+
+def run(test_log=None):
+    o = outbreak(test_log)
+    o.simulate()
+    return o.society.test_recorder
+
+
+def test_log_on_disk_matches_log_in_memory(tmp_path):
+    in_memory = run()
+    on_disk = run(tmp_path)
+    assert len(on_disk) == len(in_memory) > 200
+    assert len(os.listdir(tmp_path)) == len(in_memory) // 100
+
+    df = in_memory.to_frame()
+    assert len(df) == len(in_memory)
+    assert df.person.between(0, 1999).all()
+    assert df.positive.dtype == 'boolean' and df.positive.any()
+    assert (df.days_elapsed >= df.days_to_complete).all()
+    pd.testing.assert_frame_equal(on_disk.to_frame(), df)
+    assert len(load_test_log(tmp_path)) == len(df)
+
+
+def test_forks_write_logs_of_their_own(tmp_path):
+    reference = run().to_frame()
+    o = outbreak(tmp_path)
+    o.simulate(n_days=15)
+    n_forked = len(o.society.test_recorder)
+    branch = o.fork(seed=1)
+    o.simulate()
+    branch.simulate()
+
+    log = branch.society.test_recorder
+    assert os.path.dirname(log.directory) == str(tmp_path)
+    pd.testing.assert_frame_equal(o.society.test_recorder.to_frame(), reference)
+    pd.testing.assert_frame_equal(load_test_log(tmp_path), reference)
+    assert len(log) > n_forked
+    pd.testing.assert_frame_equal(log.to_frame().iloc[:n_forked], reference.iloc[:n_forked])
+    assert not log.to_frame().equals(reference)
+
+
+def test_log_keeps_notes_of_contacts(tmp_path):
+    s = LateralFlowUK()
+    s.test_recorder = TestLog(tmp_path, chunk_size=100)
+    o = Outbreak(s, Covid(), pop_size=2000, seed_size=20, n_days=20,
+                 population_type=functools.partial(FixedNetworkPopulation, transmission=VECTORIZED), seed=42)
+    o.simulate()
+    df = s.test_recorder.to_frame()
+    contacts = df.notes.apply(lambda n: type(n) == tuple and n[0] == 'contact')
+    assert contacts.any() and not contacts.all()
+    assert df.notes[contacts].apply(lambda n: n[1]).tolist() == df.contact_depth[contacts].tolist()
+    assert df.contact_depth[~contacts].isna().all()
+    assert set(df.notes[~contacts]) <= {'symptoms', 'valency', ''}
+    pd.testing.assert_frame_equal(load_test_log(tmp_path), df)
@@ -0,0 +1,40 @@
+import functools
+import tracemalloc
+
+import numpy as np
+
+from codit.outbreak import Outbreak
+from codit.society.lateral import LateralFlowUK
+from codit.disease import Covid
+from codit.population import FixedNetworkPopulation
+from codit.population.transmission import VECTORIZED
+
+
+def outbreak(**kwargs):
+    return Outbreak(LateralFlowUK(config=dict(SIMULATOR_PERIODS_PER_DAY=2)), Covid(), pop_size=2000, seed_size=20,
+                    n_days=30, population_type=functools.partial(FixedNetworkPopulation, transmission=VECTORIZED),
+                    seed=42, **kwargs)
+
+
+def test_timings_and_profile():
+    reference = outbreak()
+    reference.simulate()
+    assert reference.recorder.timings is None
+
+    o = outbreak(timing=True, profile_steps=(10, 20))
+    o.simulate()
+    np.testing.assert_array_equal(o.recorder.story, reference.recorder.story)
+
+    timings = o.recorder.timings
+    for phase in ['update time', 'manage outbreak', 'attack', 'record', 'update tests', 'act on tests',
+                  'expire lateral tests', 'high valencies']:
+        assert timings.calls[phase] == 60
+    assert timings.seconds['manage outbreak'] >= timings.seconds['act on tests'] > 0
+    assert timings['count']['infections'] == o.pop.count_infected() - 20
+    assert timings['count']['tests processed'] == len(o.society.test_recorder)
+    assert timings['count']['tests added'] >= timings['count']['tests processed']
+    assert timings['count']['contacts traced'] > 0
+
+    assert any(f[2] == 'attack_in_groupings' for f in o.recorder.profile.stats)
+    assert o.recorder.memory.statistics('lineno')
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,135 @@
+import functools
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+import codit
+from codit.outbreak import Outbreak
+from codit.society import Society, TestingTracingSociety
+from codit.disease import Covid, Disease
+from codit.population import FixedNetworkPopulation
+from codit.population.covid import PersonCovid
+from codit.population.person import Person
+from codit.population.network import CSR
+from codit.rng import RandomStream
+from codit.population.transmission import PAIRWISE, VECTORIZED, PRESSURE, pairwise_infections
+from codit.population.networks.household_workplace import HouseholdWorkplacePopulation
+from codit.population.networks.city import CityPopulation
+
+
+def masks(n, infectious=(), infected=(), isolating=()):
+    m = [np.zeros(n, dtype=bool) for _ in range(3)]
+    for mask, who in zip(m, [infectious, set(infectious) | set(infected), isolating]):
+        mask[list(who)] = True
+    return m[0], ~m[1], m[2]
+
+
+def test_pairwise_infections_attribution():
+    cliques = CSR.from_rows([[0, 1, 2], [3, 4], [1, 5], [2, 6]])
+    infectious, susceptible, isolating = masks(7, infectious=[0, 5], infected=[4], isolating=[6])
+    victims, infectors = pairwise_infections(cliques, infectious, susceptible, isolating, np.ones(7),
+                                             np.random.default_rng(42))
+    # 1 is attacked by 0 before 5, 4 is immune, 6 is isolating
+    assert victims.tolist() == [1, 2]
+    assert infectors.tolist() == [0, 0]
+
+
+def test_pairwise_infection_rate():
+    cliques = CSR.from_rows([list(range(i * 10, i * 10 + 10)) for i in range(2000)])
+    infectious, susceptible, isolating = masks(20000, infectious=[i * 10 + j for i in range(2000) for j in range(3)])
+    victims, infectors = pairwise_infections(cliques, infectious, susceptible, isolating, np.full(20000, 0.1),
+                                             np.random.default_rng(42))
+    np.testing.assert_allclose(len(victims) / (2000 * 7), 1 - 0.9 ** 3, atol=0.01)
+    assert (victims // 10 == infectors // 10).all()
+
+
+def test_vectorized_outbreak():
+    o = Outbreak(TestingTracingSociety(), Covid(), pop_size=5000, seed_size=50, n_days=60, seed=42,
+                 population_type=functools.partial(HouseholdWorkplacePopulation, transmission=VECTORIZED))
+    o.simulate()
+    assert o.pop.count_infected() > 100
+    assert all(p.infector is None or p in p.infector.victims for p in o.pop.people)
+    assert sum(len(p.victims) for p in o.pop.people) == sum(p.infector is not None for p in o.pop.people)
+
+
+class ChainPopulation(FixedNetworkPopulation):
+    def fix_cliques(self, encounter_size):
+        return CSR.from_rows([[0, 1], [1, 2]])
+
+
+def test_infected_attack_from_the_next_step():
+    # a toy Person is infectious as soon as they are infected: the loop lets 1 pass it on to 2 in the step that 0
+    # infects 1, but the batched kernels wait for the next step, with and without a calendar of the disease
+    for event_driven in [False, True]:
+        for transmission, infected_per_step in [(PAIRWISE, [3, 3]), (VECTORIZED, [2, 3]), (PRESSURE, [2, 3])]:
+            pop = ChainPopulation(3, Society(episodes_per_day=1), person_type=Person, transmission=transmission,
+                                  event_driven=event_driven, rng=RandomStream(42))
+            pop.people[0].set_infected(Disease(days_infectious=10, pr_transmission_per_day=1))
+            n_infected = []
+            for _ in infected_per_step:
+                pop.attack_in_groupings(None)
+                pop.update_time()
+                n_infected.append(pop.count_infected())
+            assert n_infected == infected_per_step, (transmission, event_driven)
+            assert [p.infector for p in pop.people] == [None, pop.people[0], pop.people[1]]
+
+
+class CareHomePopulation(FixedNetworkPopulation):
+    def fix_cliques(self, encounter_size):
+        return [set(self.people)]
+
+
+def attack_care_home(transmission, rng, n_trials=400, n_infectious=3):
+    """
+    :return: for each trial, the number of people infected and the position among the infectious of each infector
+    """
+    d = Covid(pr_transmission_per_day=0.05)
+    pop = CareHomePopulation(100, Society(), person_type=PersonCovid, transmission=transmission, rng=rng)
+    n_infected, infector_rank = [], []
+    for _ in range(n_trials):
+        society = Society()
+        society.rng = rng
+        pop.reset_people(society)
+        for p in pop.people[:n_infectious]:
+            p.set_infected(d)
+            p.infectious = True
+        pop.attack_in_groupings(None)
+        victims = [p for p in pop.people if p.infector is not None]
+        n_infected.append(len(victims))
+        infector_rank += [p.infector.idx for p in victims]
+    return np.array(n_infected), np.bincount(infector_rank, minlength=n_infectious)
+
+
+def test_pressure_matches_pairwise_loop():
+    rng = RandomStream(42)
+    expected_mean = 97 * (1 - 0.95 ** 3)
+    for transmission in [PAIRWISE, PRESSURE]:
+        n_infected, infectors = attack_care_home(transmission, rng)
+        assert abs(n_infected.mean() - expected_mean) < 4 * n_infected.std() / np.sqrt(len(n_infected))
+        assert abs(n_infected.var() - expected_mean * 0.95 ** 3) < 0.2 * expected_mean
+        if transmission == PRESSURE:
+            # the pairwise loop takes infectors in set order, but the pressure model picks them uniformly
+            assert np.abs(infectors / infectors.sum() - 1 / 3).max() < 0.03
+
+
+def seeded_story(population_type):
+    o = Outbreak(TestingTracingSociety(), Covid(), pop_size=2000, seed_size=20, n_days=20,
+                 population_type=population_type, seed=7)
+    o.simulate()
+    return o.recorder.story
+
+
+def test_pairwise_loop_is_reproducible_across_processes():
+    # people hash by where they are in memory, which changes from one process to the next, so the loop over
+    # cliques of more than two people must not take them in the order of a set
+    script = ("import sys, test_transmission as t; "
+              "print(t.seeded_story(getattr(t, sys.argv[1])))")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.dirname(os.path.dirname(codit.__file__)),
+                                                        os.path.dirname(__file__)]))
+    for population_type in (HouseholdWorkplacePopulation, CityPopulation):
+        assert population_type.TRANSMISSION == PAIRWISE
+        runs = [subprocess.run([sys.executable, '-c', script, population_type.__name__], env=env, check=True,
+                               capture_output=True, text=True).stdout for _ in range(2)]
+        assert runs[0] == runs[1] == f"{seeded_story(population_type)}\n"